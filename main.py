@@ -5,8 +5,10 @@
 メインエントリーポイント
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
+import os
 import sys
 
 import typer
@@ -129,8 +131,8 @@ def generate(
     console.print(f"[cyan]台本: {script_data.title}[/cyan]")
     console.print(f"シーン数: {len(script_data.scenes)}, セリフ数: {script_data.get_total_lines()}")
     
-    # VOICEVOX確認
-    voicevox = VoicevoxClientSync()
+    # VOICEVOX確認（同じセリフの音声は再生成しない）
+    voicevox = VoicevoxClientSync(cache_dir=Path(".cache/voices"))
     if not voicevox.is_available():
         console.print("[red]エラー: VOICEVOXが起動していません[/red]")
         raise typer.Exit(1)
@@ -143,112 +145,147 @@ def generate(
     current_time = 0.0
     
     audio_dir = Path(config.paths.output_audio)
-    audio_files = []
     
     # スクロール用の台本テキスト収集
     script_lines_for_scroll = []
     
+    # キャラクターごとの表示名・スピーカーID（登場キャラクター数ぶんだけ解決）
+    character_info = {}
+    for character in script_data.get_characters():
+        char_config = config.get_character_config(character)
+        character_info[character] = (
+            char_config.name if char_config else character,
+            config.get_speaker_id(character),
+        )
+    
+    # 台本順にセリフと音声生成ジョブを収集
+    all_lines = []
+    voice_jobs = []
+    for scene in script_data.scenes:
+        for line in scene.lines:
+            name, speaker_id = character_info[line.character]
+            
+            # スクロール用テキスト収集
+            script_lines_for_scroll.append(f"{name}: {line.text}")
+            
+            audio_path = audio_dir / f"line_{len(all_lines):04d}.wav"
+            all_lines.append((line, name, audio_path))
+            voice_jobs.append({
+                "text": line.text,
+                "speaker": speaker_id,
+                "output_path": audio_path,
+                "speed_scale": line.speed,
+                "pitch_scale": line.pitch,
+                "return_audio": False,  # ファイルに直接書き込めばよい
+            })
+    
     # まず全体の時間を計算するために音声を生成
     with Progress(
         SpinnerColumn(),
         TextColumn("[bold blue]{task.description}"),
     ) as progress:
-        # 音声生成
-        task = progress.add_task("音声生成中...", total=script_data.get_total_lines())
+        # 音声生成（VOICEVOXへ並列リクエスト）
+        task = progress.add_task("音声生成中...", total=len(voice_jobs))
+        voicevox.text_to_speech_batch(
+            voice_jobs,
+            on_complete=lambda _: progress.update(task, advance=1),
+        )
+    
+    audio_files = [audio_path for _, _, audio_path in all_lines]
+    
+    # 音声長取得（WAVヘッダーのみ読み込み、並列化）
+    audio_processor = AudioProcessor()
+    with ThreadPoolExecutor() as executor:
+        durations = list(executor.map(audio_processor.get_wav_duration_fast, audio_files))
+    
+    # 常時表示するキャラクター: (名前, デフォルト位置, 左右反転)
+    # 霊夢は左側で右向き、魔理沙は右側で左向き（元のまま）
+    stage_characters = [
+        ("reimu", (350, 650), True),
+        ("marisa", (1570, 650), False),
+    ]
+    
+    # ループ内で不変な立ち絵の設定・画像パスを事前に解決
+    expressions = {line.expression for line, _, _ in all_lines} | {"normal"}
+    stage_layout = []
+    for char_name, default_pos, flip in stage_characters:
+        char_config = config.get_character_config(char_name)
+        images = {
+            expr: path
+            for expr in expressions
+            if (path := char_manager.get_expression_path(char_name, expr)) and path.exists()
+        }
+        position = char_config.position if char_config else default_pos
+        stage_layout.append((char_name, position, flip, images))
+    
+    # 台本順に立ち絵・セリフの列を組み立て、最後にまとめてタイムラインへ追加
+    # キャラクターごと: (表情, 開始時間, 持続時間, スケール, 画像パス)
+    stage_tracks = {char_name: [] for char_name, *_ in stage_layout}
+    # (字幕テキスト, キャラクター, 開始時間, 持続時間, 音声パス, 表情)
+    dialogue_rows = []
+    
+    for (line, name, audio_path), duration in zip(all_lines, durations):
+        # 両キャラクターを常時表示（話している方を強調）
+        speaking_char = line.character.lower()
+        
+        # キャラクタークリップの長さ = セリフ時間 + ポーズ時間（次のセリフまで常時表示）
+        char_duration = duration + line.pause_after
+        
+        for char_name, position, flip, images in stage_layout:
+            is_speaking = char_name == speaking_char
+            expression = line.expression if is_speaking else "normal"
+            image_path = images.get(expression)
+            if not image_path:
+                continue
+            stage_tracks[char_name].append((
+                expression,
+                current_time,
+                char_duration,  # ポーズを含む
+                0.9 if is_speaking else 0.75,  # 話している時は大きく、聞いている時は小さく
+                image_path,
+            ))
         
-        line_index = 0
-        for scene in script_data.scenes:
-            for line in scene.lines:
-                # スクロール用テキスト収集
-                display_name = config.get_character_config(line.character)
-                name = display_name.name if display_name else line.character
-                script_lines_for_scroll.append(f"{name}: {line.text}")
-                
-                # 音声生成
-                speaker_id = config.get_speaker_id(line.character)
-                audio_path = audio_dir / f"line_{line_index:04d}.wav"
-                
-                voicevox.text_to_speech(
-                    text=line.text,
-                    speaker=speaker_id,
-                    output_path=audio_path,
-                    speed_scale=line.speed,
-                    pitch_scale=line.pitch,
-                )
-                audio_files.append(audio_path)
-                
-                # 音声長取得
-                audio_processor = AudioProcessor()
-                duration = audio_processor.get_duration_from_file(audio_path)
-                
-                # 両キャラクターを常時表示（話している方を強調）
-                speaking_char = line.character.lower()
-                
-                # キャラクタークリップの長さ = セリフ時間 + ポーズ時間（次のセリフまで常時表示）
-                char_duration = duration + line.pause_after
-                
-                # 霊夢の立ち絵（左側、右向き）
-                reimu_config = config.get_character_config("reimu")
-                reimu_image = char_manager.get_expression_path(
-                    "reimu", 
-                    line.expression if speaking_char == "reimu" else "normal"
-                )
-                if reimu_image and reimu_image.exists():
-                    reimu_pos = reimu_config.position if reimu_config else (350, 650)
-                    # 話している時は大きく、聞いている時は小さく
-                    reimu_scale = 0.9 if speaking_char == "reimu" else 0.75
-                    timeline.add_character(
-                        character="reimu",
-                        expression=line.expression if speaking_char == "reimu" else "normal",
-                        start_time=current_time,
-                        duration=char_duration,  # ポーズを含む
-                        image_path=reimu_image,
-                        position=reimu_pos,
-                        scale=reimu_scale,
-                        flip_horizontal=True,  # 右向き
-                    )
-                
-                # 魔理沙の立ち絵（右側、左向き）
-                marisa_config = config.get_character_config("marisa")
-                marisa_image = char_manager.get_expression_path(
-                    "marisa",
-                    line.expression if speaking_char == "marisa" else "normal"
-                )
-                if marisa_image and marisa_image.exists():
-                    marisa_pos = marisa_config.position if marisa_config else (1570, 650)
-                    # 話している時は大きく、聞いている時は小さく
-                    marisa_scale = 0.9 if speaking_char == "marisa" else 0.75
-                    timeline.add_character(
-                        character="marisa",
-                        expression=line.expression if speaking_char == "marisa" else "normal",
-                        start_time=current_time,
-                        duration=char_duration,  # ポーズを含む
-                        image_path=marisa_image,
-                        position=marisa_pos,
-                        scale=marisa_scale,
-                        flip_horizontal=False,  # 左向き（元のまま）
-                    )
-                
-                # セリフをタイムラインに追加（話者名付き）
-                subtitle_text = f"【{name}】{line.text}"
-                timeline.add_dialogue(
-                    text=subtitle_text,
-                    character=line.character,
-                    start_time=current_time,
-                    duration=duration,  # セリフはポーズを含まない
-                    audio_path=audio_path,
-                    expression=line.expression,
-                )
-                
-                current_time += duration + line.pause_after
-                line_index += 1
-                progress.update(task, advance=1)
+        # セリフ（話者名付き）。セリフはポーズを含まない
+        dialogue_rows.append((
+            f"【{name}】{line.text}",
+            line.character,
+            current_time,
+            duration,
+            audio_path,
+            line.expression,
+        ))
+        
+        current_time += duration + line.pause_after
+    
+    for char_name, position, flip, _ in stage_layout:
+        rows = stage_tracks[char_name]
+        if not rows:
+            continue
+        expressions_col, starts, char_durations, scales, image_paths = zip(*rows)
+        timeline.extend_characters(
+            char_name,
+            expressions_col,
+            starts,
+            char_durations,
+            scales,
+            image_paths,
+            position=position,
+            flip_horizontal=flip,
+        )
+    
+    if dialogue_rows:
+        timeline.extend_dialogues(*zip(*dialogue_rows))
     
     # BGMを追加
     asset_manager = AssetManager()
-    bgm_files = list(Path(config.paths.bgm).glob("*.mp3")) + list(Path(config.paths.bgm).glob("*.wav"))
-    if bgm_files:
-        bgm_path = bgm_files[0]
+    bgm_path = None
+    if os.path.isdir(config.paths.bgm):
+        with os.scandir(config.paths.bgm) as it:
+            bgm_path = next(
+                (Path(e.path) for e in it if e.name.lower().endswith((".mp3", ".wav"))),
+                None,
+            )
+    if bgm_path:
         timeline.add_bgm(bgm_path, 0.0, current_time, fade_in=2.0, fade_out=3.0)
         console.print(f"[green]BGM追加: {bgm_path.name}[/green]")
     
@@ -271,9 +308,9 @@ def generate(
             
             renderer = VideoRenderer()
             
-            # スクロールテキスト背景を直接render_from_timelineに渡す
+            # スクロールテキスト背景を直接render_streamに渡す
             scroll_text = "\n".join(script_lines_for_scroll)
-            renderer.render_from_timeline(
+            renderer.render_stream(
                 timeline, 
                 output,
                 scrolling_text=scroll_text,
@@ -317,8 +354,17 @@ def generate_sample():
         ],
     }
     
-    with open(output_path, "w", encoding="utf-8") as f:
-        yaml.dump(data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    # libyamlのC実装があれば使う（なければ純Python版）
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    with open(output_path, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+        yaml.dump(
+            data,
+            f,
+            Dumper=dumper,
+            allow_unicode=True,
+            default_flow_style=False,
+            sort_keys=False,
+        )
     
     console.print(f"[green]サンプル台本生成完了: {output_path}[/green]")
     console.print("\n台本内容:")
@@ -340,12 +386,16 @@ def download_assets(
         raise typer.Exit(1)
     
     downloader = AssetDownloader()
-    results = downloader.download_from_list(list_file, output_dir)
+    
+    # 完了したものから集計し、ダウンロード結果を保持し続けない
+    counts = dict.fromkeys(AssetDownloader.LIST_TYPES, 0)
+    for asset_type, _ in downloader.iter_download_from_list(list_file, output_dir):
+        counts[asset_type] += 1
     
     console.print("[green]ダウンロード完了[/green]")
-    for asset_type, files in results.items():
-        if files:
-            console.print(f"  {asset_type}: {len(files)}ファイル")
+    for asset_type, count in counts.items():
+        if count:
+            console.print(f"  {asset_type}: {count}ファイル")
 
 
 @app.command()
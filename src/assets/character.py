@@ -8,13 +8,35 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 import json
+import os
 
 from PIL import Image
+import numpy as np
+
+try:
+    import pyvips  # オプション: libvipsによる高速なPNGデコード
+except (ImportError, OSError):
+    pyvips = None
 
 from ..utils.config import Config
 from ..utils.logger import get_logger
 
 
+def _decode_rgba(path: Path) -> Image.Image:
+    """画像をRGBAでデコード（pyvipsがあれば使用し、なければPillow）"""
+    if pyvips is not None:
+        try:
+            vips_image = pyvips.Image.new_from_file(str(path), access="sequential")
+            if vips_image.bands == 4 and vips_image.format == "uchar":
+                return Image.fromarray(vips_image.numpy(), "RGBA")
+        except pyvips.Error:
+            pass  # Pillowにフォールバック
+    
+    with Image.open(path) as img:
+        img.load()
+        return img.convert("RGBA")
+
+
 @dataclass
 class CharacterExpression:
     """キャラクター表情"""
@@ -22,15 +44,27 @@ class CharacterExpression:
     image_path: Path
     mouth_open_path: Optional[Path] = None  # 口開き画像（口パク用）
     
+    # デコード済み画像のキャッシュ（同じPNGを何度もデコードしない）
+    _image: Optional[Image.Image] = field(default=None, init=False, repr=False)
+    _mouth_open_image: Optional[Image.Image] = field(default=None, init=False, repr=False)
+    
     def get_image(self) -> Image.Image:
-        """表情画像を取得"""
-        return Image.open(self.image_path).convert("RGBA")
+        """
+        表情画像を取得（初回のみデコード）
+        
+        キャッシュした画像をそのまま返すので、書き換えてはいけない
+        （変更する場合は copy() してから使う）
+        """
+        if self._image is None:
+            self._image = _decode_rgba(self.image_path)
+        return self._image
     
     def get_mouth_open_image(self) -> Optional[Image.Image]:
-        """口開き画像を取得"""
-        if self.mouth_open_path and self.mouth_open_path.exists():
-            return Image.open(self.mouth_open_path).convert("RGBA")
-        return None
+        """口開き画像を取得（初回のみデコード。get_imageと同じく書き換え不可）"""
+        if self._mouth_open_image is None:
+            if self.mouth_open_path and self.mouth_open_path.exists():
+                self._mouth_open_image = _decode_rgba(self.mouth_open_path)
+        return self._mouth_open_image
 
 
 @dataclass
@@ -49,10 +83,10 @@ class Character:
         return self.expressions.get(expression) or self.expressions.get(self.default_expression)
     
     def get_expression_image(self, expression: str) -> Optional[Image.Image]:
-        """表情画像を取得"""
+        """表情画像を取得（呼び出しごとに複製を返すので、書き換えてもよい）"""
         expr = self.get_expression(expression)
         if expr:
-            return expr.get_image()
+            return expr.get_image().copy()
         return None
     
     def list_expressions(self) -> List[str]:
@@ -76,6 +110,13 @@ class CharacterManager:
         "thinking": ["考え中", "悩み"],
     }
 
+    # エイリアス（小文字）→ 正規名の逆引き表
+    _ALIAS_TO_CANONICAL = {
+        alias.lower(): canonical
+        for canonical, aliases in EXPRESSION_ALIASES.items()
+        for alias in [canonical] + aliases
+    }
+
     def __init__(self, characters_dir: Optional[Path] = None):
         """
         Args:
@@ -100,22 +141,28 @@ class CharacterManager:
             self.logger.warning(f"キャラクターディレクトリが存在しません: {self.characters_dir}")
             return
         
-        for char_dir in self.characters_dir.iterdir():
-            if char_dir.is_dir():
-                try:
-                    character = self._load_character_from_dir(char_dir)
-                    self.characters[character.name] = character
-                    self.logger.debug(f"キャラクター読み込み: {character.name} ({len(character.expressions)}表情)")
-                except Exception as e:
-                    self.logger.warning(f"キャラクター読み込み失敗: {char_dir}: {e}")
+        with os.scandir(self.characters_dir) as it:
+            char_dirs = [Path(e.path) for e in it if e.is_dir()]
+        
+        for char_dir in char_dirs:
+            try:
+                character = self._load_character_from_dir(char_dir)
+                self.characters[character.name] = character
+                self.logger.debug(f"キャラクター読み込み: {character.name} ({len(character.expressions)}表情)")
+            except Exception as e:
+                self.logger.warning(f"キャラクター読み込み失敗: {char_dir}: {e}")
 
     def _load_character_from_dir(self, char_dir: Path) -> Character:
         """ディレクトリからキャラクターを読み込み"""
         name = char_dir.name
         
+        # ディレクトリ内のファイル名を一度だけ列挙（存在確認を辞書引きにする）
+        with os.scandir(char_dir) as it:
+            files = {e.name: e.path for e in it if e.is_file()}
+        
         # キャラクター設定ファイルを確認
         config_file = char_dir / "character.json"
-        if config_file.exists():
+        if config_file.name in files:
             char_config = json.loads(config_file.read_text(encoding="utf-8"))
             display_name = char_config.get("display_name", name)
             default_expression = char_config.get("default_expression", "normal")
@@ -129,19 +176,22 @@ class CharacterManager:
         
         # 表情画像を読み込み
         expressions = {}
-        for image_file in char_dir.glob("*.png"):
+        for file_name, file_path in files.items():
+            if not file_name.endswith(".png"):
+                continue
+            image_file = Path(file_path)
             expr_name = image_file.stem.lower()
             
             # エイリアスを正規化
             normalized_name = self._normalize_expression_name(expr_name)
             
             # 口開き画像を探す
-            mouth_open = char_dir / f"{image_file.stem}_open.png"
+            mouth_open = files.get(f"{image_file.stem}_open.png")
             
             expressions[normalized_name] = CharacterExpression(
                 name=normalized_name,
                 image_path=image_file,
-                mouth_open_path=mouth_open if mouth_open.exists() else None,
+                mouth_open_path=Path(mouth_open) if mouth_open else None,
             )
         
         return Character(
@@ -184,12 +234,7 @@ class CharacterManager:
     def _normalize_expression_name(self, name: str) -> str:
         """表情名を正規化"""
         name_lower = name.lower()
-        
-        for canonical, aliases in self.EXPRESSION_ALIASES.items():
-            if name_lower == canonical or name_lower in [a.lower() for a in aliases]:
-                return canonical
-        
-        return name_lower
+        return self._ALIAS_TO_CANONICAL.get(name_lower, name_lower)
 
     def get_character(self, name: str) -> Optional[Character]:
         """キャラクターを取得"""
@@ -200,7 +245,7 @@ class CharacterManager:
         character_name: str,
         expression: str = "normal",
     ) -> Optional[Image.Image]:
-        """キャラクターの表情画像を取得"""
+        """キャラクターの表情画像を取得（複製を返すので、書き換えてもよい）"""
         character = self.get_character(character_name)
         if character:
             return character.get_expression_image(expression)
@@ -247,7 +292,8 @@ class CharacterManager:
             fps: フレームレート
         
         Returns:
-            フレーム画像リスト
+            フレーム画像リスト（口閉じ・口開きの画像をそれぞれ同じオブジェクトで共有する。
+            呼び出しごとに複製するので、キャッシュ済みの表情画像には影響しない）
         """
         character = self.get_character(character_name)
         if not character:
@@ -257,7 +303,7 @@ class CharacterManager:
         if not expr:
             return []
         
-        base_image = expr.get_image()
+        base_image = expr.get_image().copy()
         mouth_open = expr.get_mouth_open_image()
         
         if not mouth_open:
@@ -265,19 +311,15 @@ class CharacterManager:
             frame_count = int(audio_duration * fps)
             return [base_image] * frame_count
         
+        mouth_open = mouth_open.copy()
+        
         # 口パクパターン生成
-        frames = []
+        # 簡易的な口パク（2フレーム開き、1フレーム閉じ）
+        # より高度な実装では音声の振幅に基づく
         frame_count = int(audio_duration * fps)
+        pattern = np.arange(frame_count) % 3 < 2
         
-        for i in range(frame_count):
-            # 簡易的な口パク（交互に開閉）
-            # より高度な実装では音声の振幅に基づく
-            if i % 3 in [0, 1]:  # 2フレーム開き、1フレーム閉じ
-                frames.append(mouth_open)
-            else:
-                frames.append(base_image)
-        
-        return frames
+        return [mouth_open if is_open else base_image for is_open in pattern.tolist()]
 
     def add_character(self, character: Character) -> None:
         """キャラクターを追加"""
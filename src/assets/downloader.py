@@ -5,9 +5,14 @@ BGM、効果音、背景画像などをダウンロードする
 """
 
 from pathlib import Path
-from typing import Dict, List, Optional, Union
-from urllib.parse import urlparse
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+import asyncio
+import atexit
+import os
 import re
+import shutil
 
 import httpx
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn
@@ -16,6 +21,76 @@ from ..utils.config import Config
 from ..utils.logger import get_logger
 
 
+# ストリーミング書き込みのチャンクサイズ
+_CHUNK_SIZE = 64 * 1024
+
+# これ以下のサイズはメモリに受けてから1回の書き込みで保存する
+_SMALL_FILE_SIZE = 1024 * 1024
+
+
+def _preallocate(f, response: httpx.Response) -> None:
+    """Content-Lengthが分かる場合は保存先ファイルの領域を先に確保"""
+    if not hasattr(os, "posix_fallocate"):
+        return
+    
+    try:
+        total = int(response.headers.get("content-length", 0))
+    except ValueError:
+        return
+    
+    if total > 0:
+        try:
+            os.posix_fallocate(f.fileno(), 0, total)
+        except OSError:
+            # 非対応のファイルシステムでは通常の書き込みにフォールバック
+            pass
+
+
+def _url_filename(url_path: str) -> str:
+    """URLのパス部分から末尾のファイル名を取り出す"""
+    return url_path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _dedupe_output_path(output_path: Path, used_paths: Set[Path]) -> Path:
+    """
+    保存先が他のジョブと重なる場合は連番を付けた別名にする
+    
+    並列ダウンロードで2つのジョブが同じファイルに書き込まないようにする
+    
+    Args:
+        output_path: 保存先パス
+        used_paths: 既に割り当てた保存先（このパスを追加する）
+    
+    Returns:
+        重ならない保存先パス（例: bg.png → bg_2.png）
+    """
+    candidate = output_path
+    number = 2
+    while candidate in used_paths:
+        candidate = output_path.with_name(f"{output_path.stem}_{number}{output_path.suffix}")
+        number += 1
+    used_paths.add(candidate)
+    return candidate
+
+
+def _copy_file_url(url: str, output_path: Path) -> bool:
+    """
+    file:// URLならローカルファイルをそのままコピー
+    
+    shutil.copyfile は Linux では os.sendfile、macOS では fcopyfile による
+    カーネル内コピーを使うため、Python側でデータを読み書きしない
+    
+    Returns:
+        file:// URLとして処理した場合はTrue
+    """
+    split = urlsplit(url)
+    if split.scheme != "file":
+        return False
+    
+    shutil.copyfile(url2pathname(split.path), output_path)
+    return True
+
+
 class AssetDownloader:
     """素材ダウンロードクラス"""
 
@@ -28,21 +103,48 @@ class AssetDownloader:
         "font": [".ttf", ".otf", ".woff", ".woff2"],
     }
 
+    # 拡張子 -> 素材タイプ（複数タイプに属する拡張子は先に定義されたタイプを優先）
+    _EXT_TO_TYPE = {
+        ext: asset_type
+        for asset_type, extensions in reversed(ASSET_TYPES.items())
+        for ext in extensions
+    }
+
+    # リストファイルで指定できる素材タイプ（それ以外は other）
+    LIST_TYPES = ["background", "bgm", "sfx", "character", "font", "other"]
+
+    # 一括ダウンロード時の同時接続数
+    DEFAULT_CONCURRENCY = 8
+
+    # 全インスタンスで共有する同期クライアント（接続を使い回す）
+    _client: Optional[httpx.Client] = None
+
     def __init__(self):
         self.logger = get_logger()
         self.config = Config.get()
 
+    @classmethod
+    def _get_client(cls) -> httpx.Client:
+        """共有の同期HTTPクライアントを取得"""
+        if cls._client is None:
+            cls._client = httpx.Client(
+                follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60.0),
+            )
+            atexit.register(cls._client.close)
+        return cls._client
+
     def get_asset_type(self, url: str) -> Optional[str]:
         """URLから素材タイプを推測"""
-        parsed = urlparse(url)
-        path = Path(parsed.path)
-        ext = path.suffix.lower()
-        
-        for asset_type, extensions in self.ASSET_TYPES.items():
-            if ext in extensions:
-                return asset_type
-        
-        return None
+        return self.get_asset_type_from_path(urlsplit(url).path)
+
+    def get_asset_type_from_path(self, url_path: str) -> Optional[str]:
+        """分解済みURLのパス部分から素材タイプを推測"""
+        filename = _url_filename(url_path)
+        dot = filename.rfind(".")
+        if dot <= 0:
+            return None
+        return self._EXT_TO_TYPE.get(filename[dot:].lower())
 
     def download_file(
         self,
@@ -65,15 +167,24 @@ class AssetDownloader:
         
         self.logger.info(f"ダウンロード: {url}")
         
+        if _copy_file_url(url, output_path):
+            self.logger.info(f"保存完了: {output_path}")
+            return output_path
+        
         headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         }
         
-        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-            response = client.get(url, headers=headers)
+        client = self._get_client()
+        with client.stream("GET", url, headers=headers, timeout=timeout) as response:
             response.raise_for_status()
             
-            output_path.write_bytes(response.content)
+            with open(output_path, "wb") as f:
+                _preallocate(f, response)
+                for chunk in response.iter_bytes(chunk_size=_CHUNK_SIZE):
+                    f.write(chunk)
+                # 確保したサイズと実際の長さが異なる場合に備えて切り詰める
+                f.truncate()
         
         self.logger.info(f"保存完了: {output_path}")
         return output_path
@@ -107,46 +218,178 @@ class AssetDownloader:
             BarColumn(),
             DownloadColumn(),
         ) as progress:
-            with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-                with client.stream("GET", url, headers=headers) as response:
-                    response.raise_for_status()
-                    
-                    total = int(response.headers.get("content-length", 0))
-                    task = progress.add_task(
-                        f"ダウンロード: {output_path.name}",
-                        total=total or None,
-                    )
-                    
-                    with open(output_path, "wb") as f:
-                        for chunk in response.iter_bytes(chunk_size=8192):
-                            f.write(chunk)
-                            progress.update(task, advance=len(chunk))
+            client = self._get_client()
+            with client.stream("GET", url, headers=headers, timeout=timeout) as response:
+                response.raise_for_status()
+                
+                total = int(response.headers.get("content-length", 0))
+                task = progress.add_task(
+                    f"ダウンロード: {output_path.name}",
+                    total=total or None,
+                )
+                
+                with open(output_path, "wb") as f:
+                    _preallocate(f, response)
+                    for chunk in response.iter_bytes(chunk_size=_CHUNK_SIZE):
+                        f.write(chunk)
+                        progress.update(task, advance=len(chunk))
+                    f.truncate()
         
         self.logger.info(f"保存完了: {output_path}")
         return output_path
 
-    def download_from_list(
+    async def _adownload(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        output_path: Path,
+    ) -> Path:
+        """1ファイルを非同期ダウンロード"""
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.logger.info(f"ダウンロード: {url}")
+        
+        if _copy_file_url(url, output_path):
+            self.logger.info(f"保存完了: {output_path}")
+            return output_path
+        
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+        }
+        
+        async with client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            
+            # 効果音などの小さいファイルはチャンクごとに書き込まず一括で保存
+            try:
+                total = int(response.headers.get("content-length", 0))
+            except ValueError:
+                total = 0
+            if 0 < total <= _SMALL_FILE_SIZE:
+                output_path.write_bytes(await response.aread())
+                self.logger.info(f"保存完了: {output_path}")
+                return output_path
+            
+            with open(output_path, "wb") as f:
+                _preallocate(f, response)
+                async for chunk in response.aiter_bytes(chunk_size=_CHUNK_SIZE):
+                    f.write(chunk)
+                f.truncate()
+        
+        self.logger.info(f"保存完了: {output_path}")
+        return output_path
+
+    def _iter_download_batch(
+        self,
+        jobs: List[Tuple[str, Path]],
+        concurrency: Optional[int] = None,
+        timeout: float = 60.0,
+    ) -> Iterator[Tuple[int, Optional[Path]]]:
+        """
+        複数ファイルを1つのクライアントで並列ダウンロードし、完了順に返す
+        
+        同時に保持するダウンロードは最大concurrency件なので、
+        件数が多くてもメモリ使用量は増えない
+        
+        Args:
+            jobs: (URL, 保存先パス) のリスト
+            concurrency: 同時ダウンロード数
+            timeout: タイムアウト（秒）
+        
+        Yields:
+            (jobsのインデックス, 保存先パス) 失敗したものは保存先パスがNone
+        """
+        if not jobs:
+            return
+        
+        if concurrency is None:
+            concurrency = self.DEFAULT_CONCURRENCY
+        concurrency = max(1, concurrency)
+        
+        loop = asyncio.new_event_loop()
+        client: Optional[httpx.AsyncClient] = None
+        tasks: List[asyncio.Task] = []
+        
+        async def start() -> None:
+            nonlocal client
+            semaphore = asyncio.Semaphore(concurrency)
+            limits = httpx.Limits(
+                max_connections=concurrency * 2,
+                max_keepalive_connections=concurrency * 2,
+            )
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                follow_redirects=True,
+                limits=limits,
+            )
+            
+            async def run_one(index: int, url: str, output_path: Path) -> Tuple[int, Optional[Path]]:
+                async with semaphore:
+                    try:
+                        return index, await self._adownload(client, url, output_path)
+                    except Exception as e:
+                        self.logger.error(f"ダウンロード失敗: {url}: {e}")
+                        return index, None
+            
+            for index, (url, output_path) in enumerate(jobs):
+                tasks.append(asyncio.ensure_future(run_one(index, url, output_path)))
+        
+        try:
+            loop.run_until_complete(start())
+            
+            pending = set(tasks)
+            while pending:
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            # 途中で打ち切られた場合も未完了のダウンロードを止めて後始末する
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            if client is not None:
+                loop.run_until_complete(client.aclose())
+            loop.close()
+
+    def _download_batch(
+        self,
+        jobs: List[Tuple[str, Path]],
+        concurrency: Optional[int] = None,
+        timeout: float = 60.0,
+    ) -> List[Optional[Path]]:
+        """
+        複数ファイルを1つのクライアントで並列ダウンロード
+        
+        Args:
+            jobs: (URL, 保存先パス) のリスト
+            concurrency: 同時ダウンロード数
+            timeout: タイムアウト（秒）
+        
+        Returns:
+            保存先パスのリスト（jobsと同じ順序、失敗したものはNone）
+        """
+        results: List[Optional[Path]] = [None] * len(jobs)
+        for index, path in self._iter_download_batch(jobs, concurrency, timeout):
+            results[index] = path
+        return results
+
+    def _parse_list_file(
         self,
         list_file: Union[str, Path],
         base_output_dir: Optional[Path] = None,
-    ) -> Dict[str, List[Path]]:
+    ) -> Tuple[List[Tuple[str, Path]], List[str]]:
         """
-        リストファイルから素材を一括ダウンロード
-        
-        リストファイル形式:
-        ```
-        background https://example.com/bg.png
-        bgm https://example.com/music.mp3
-        sfx https://example.com/sound.wav
-        # コメント行
-        ```
+        リストファイルを (URL, 保存先パス) のジョブと素材タイプに分解
         
         Args:
             list_file: リストファイルパス
             base_output_dir: 出力ベースディレクトリ
         
         Returns:
-            タイプ別ダウンロードファイルリスト
+            (ジョブのリスト, ジョブごとの素材タイプのリスト)
         """
         list_file = Path(list_file)
         if not list_file.exists():
@@ -155,17 +398,13 @@ class AssetDownloader:
         if base_output_dir is None:
             base_output_dir = Path("assets")
         
-        results: Dict[str, List[Path]] = {
-            "background": [],
-            "bgm": [],
-            "sfx": [],
-            "character": [],
-            "font": [],
-            "other": [],
-        }
-        
         lines = list_file.read_text(encoding="utf-8").strip().split("\n")
         
+        jobs: List[Tuple[str, Path]] = []
+        job_types: List[str] = []
+        planned: Dict[str, int] = {asset_type: 0 for asset_type in self.LIST_TYPES}
+        used_paths: Set[Path] = set()
+        
         for line in lines:
             line = line.strip()
             
@@ -177,22 +416,24 @@ class AssetDownloader:
             parts = line.split(None, 1)
             if len(parts) == 2:
                 asset_type, url = parts
+                url_path = urlsplit(url).path
             elif len(parts) == 1:
                 url = parts[0]
-                asset_type = self.get_asset_type(url) or "other"
+                url_path = urlsplit(url).path
+                asset_type = self.get_asset_type_from_path(url_path) or "other"
             else:
                 continue
             
             # タイプの正規化
             asset_type = asset_type.lower()
-            if asset_type not in results:
+            if asset_type not in planned:
                 asset_type = "other"
             
             # ファイル名を決定
-            parsed = urlparse(url)
-            filename = Path(parsed.path).name
+            filename = _url_filename(url_path)
+            planned[asset_type] += 1
             if not filename:
-                filename = f"asset_{len(results[asset_type]) + 1}"
+                filename = f"asset_{planned[asset_type]}"
             
             # 保存先パスを決定
             if asset_type == "other":
@@ -200,21 +441,76 @@ class AssetDownloader:
             else:
                 output_dir = base_output_dir / (asset_type + "s")  # backgrounds, bgms, etc.
             
-            output_path = output_dir / filename
-            
-            try:
-                downloaded = self.download_file(url, output_path)
-                results[asset_type].append(downloaded)
-            except Exception as e:
-                self.logger.error(f"ダウンロード失敗: {url}: {e}")
+            jobs.append((url, _dedupe_output_path(output_dir / filename, used_paths)))
+            job_types.append(asset_type)
+        
+        return jobs, job_types
+
+    def download_from_list(
+        self,
+        list_file: Union[str, Path],
+        base_output_dir: Optional[Path] = None,
+        concurrency: Optional[int] = None,
+    ) -> Dict[str, List[Path]]:
+        """
+        リストファイルから素材を一括ダウンロード
+        
+        リストファイル形式:
+        ```
+        background https://example.com/bg.png
+        bgm https://example.com/music.mp3
+        sfx https://example.com/sound.wav
+        # コメント行
+        ```
+        
+        Args:
+            list_file: リストファイルパス
+            base_output_dir: 出力ベースディレクトリ
+            concurrency: 同時ダウンロード数
+        
+        Returns:
+            タイプ別ダウンロードファイルリスト
+        """
+        jobs, job_types = self._parse_list_file(list_file, base_output_dir)
+        
+        results: Dict[str, List[Path]] = {asset_type: [] for asset_type in self.LIST_TYPES}
+        
+        downloaded = self._download_batch(jobs, concurrency=concurrency)
+        for asset_type, path in zip(job_types, downloaded):
+            if path is not None:
+                results[asset_type].append(path)
         
         return results
 
+    def iter_download_from_list(
+        self,
+        list_file: Union[str, Path],
+        base_output_dir: Optional[Path] = None,
+        concurrency: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Path]]:
+        """
+        リストファイルから素材を一括ダウンロードし、完了したものから順に返す
+        
+        Args:
+            list_file: リストファイルパス（形式はdownload_from_listと同じ）
+            base_output_dir: 出力ベースディレクトリ
+            concurrency: 同時ダウンロード数
+        
+        Yields:
+            (素材タイプ, 保存先パス) 失敗したものは返さない
+        """
+        jobs, job_types = self._parse_list_file(list_file, base_output_dir)
+        
+        for index, path in self._iter_download_batch(jobs, concurrency=concurrency):
+            if path is not None:
+                yield job_types[index], path
+
     def download_from_urls(
         self,
         urls: List[str],
         output_dir: Path,
         auto_categorize: bool = True,
+        concurrency: Optional[int] = None,
     ) -> List[Path]:
         """
         URLリストから素材をダウンロード
@@ -223,35 +519,33 @@ class AssetDownloader:
             urls: URLリスト
             output_dir: 出力ディレクトリ
             auto_categorize: 自動カテゴリ分類
+            concurrency: 同時ダウンロード数
         
         Returns:
             ダウンロードファイルリスト
         """
-        results = []
+        jobs: List[Tuple[str, Path]] = []
+        used_paths: Set[Path] = set()
         
         for url in urls:
-            try:
-                parsed = urlparse(url)
-                filename = Path(parsed.path).name
-                if not filename:
-                    filename = f"asset_{len(results) + 1}"
-                
-                if auto_categorize:
-                    asset_type = self.get_asset_type(url)
-                    if asset_type:
-                        output_path = output_dir / (asset_type + "s") / filename
-                    else:
-                        output_path = output_dir / filename
+            url_path = urlsplit(url).path
+            filename = _url_filename(url_path)
+            if not filename:
+                filename = f"asset_{len(jobs) + 1}"
+            
+            if auto_categorize:
+                asset_type = self.get_asset_type_from_path(url_path)
+                if asset_type:
+                    output_path = output_dir / (asset_type + "s") / filename
                 else:
                     output_path = output_dir / filename
-                
-                downloaded = self.download_file(url, output_path)
-                results.append(downloaded)
-                
-            except Exception as e:
-                self.logger.error(f"ダウンロード失敗: {url}: {e}")
+            else:
+                output_path = output_dir / filename
+            
+            jobs.append((url, _dedupe_output_path(output_path, used_paths)))
         
-        return results
+        downloaded = self._download_batch(jobs, concurrency=concurrency)
+        return [path for path in downloaded if path is not None]
 
 
 # 素材サイト別ダウンローダー
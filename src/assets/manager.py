@@ -4,16 +4,51 @@
 素材ファイルの検索・整理を行う
 """
 
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 import hashlib
+import os
+import random
+import re
 
 from ..utils.config import Config
 from ..utils.logger import get_logger
 
 
-@dataclass
+def _scan_files(directory: str, extensions: Set[str]) -> Iterator[os.DirEntry]:
+    """
+    ディレクトリを再帰的に1回だけ走査し、拡張子が一致するファイルを返す
+    
+    Args:
+        directory: 走査するディレクトリ
+        extensions: 対象拡張子（小文字、ドット付き）
+    
+    Yields:
+        一致したファイルのDirEntry
+    """
+    try:
+        it = os.scandir(directory)
+    except PermissionError:
+        return
+    
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_files(entry.path, extensions)
+            elif entry.is_file():
+                name = entry.name
+                dot = name.rfind(".")
+                if dot < 0:
+                    continue
+                # 大半を占める小文字拡張子はlower()を呼ばずに判定
+                ext = name[dot:]
+                if ext in extensions or ext.lower() in extensions:
+                    yield entry
+
+
+@dataclass(slots=True)
 class Asset:
     """素材情報"""
     path: Path
@@ -21,6 +56,13 @@ class Asset:
     name: str
     size: int
     checksum: Optional[str] = None
+    # 検索用に小文字化した名前（生成時に1回だけ計算）
+    name_lower: str = field(init=False, repr=False)
+    filename_lower: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.name_lower = self.name.lower()
+        self.filename_lower = self.path.name.lower()
 
     @property
     def extension(self) -> str:
@@ -53,20 +95,27 @@ class AssetManager:
         else:
             self.base_dir = Path("assets")
         
+        # 素材タイプ -> ディレクトリ（設定で指定されているもの）
+        self._dir_mapping: Dict[str, Path] = {
+            "background": Path(self.config.paths.backgrounds),
+            "bgm": Path(self.config.paths.bgm),
+            "sfx": Path(self.config.paths.sfx),
+            "character": Path(self.config.paths.characters),
+            "font": Path(self.config.paths.fonts),
+        }
+        
         self._cache: Dict[str, List[Asset]] = {}
+        # 素材タイプ -> (索引元の素材リスト, 名前 -> (リスト内位置, 素材), ファイル名 -> (リスト内位置, 素材))
+        self._name_index: Dict[
+            str,
+            Tuple[List[Asset], Dict[str, Tuple[int, Asset]], Dict[str, Tuple[int, Asset]]],
+        ] = {}
 
     def get_assets_dir(self, asset_type: str) -> Path:
         """素材タイプのディレクトリを取得"""
-        dir_mapping = {
-            "background": self.config.paths.backgrounds,
-            "bgm": self.config.paths.bgm,
-            "sfx": self.config.paths.sfx,
-            "character": self.config.paths.characters,
-            "font": self.config.paths.fonts,
-        }
-        
-        if asset_type in dir_mapping:
-            return Path(dir_mapping[asset_type])
+        assets_dir = self._dir_mapping.get(asset_type)
+        if assets_dir is not None:
+            return assets_dir
         else:
             return self.base_dir / asset_type
 
@@ -89,19 +138,24 @@ class AssetManager:
             return self._cache[asset_type]
         
         assets_dir = self.get_assets_dir(asset_type)
-        extensions = self.TYPE_EXTENSIONS.get(asset_type, [])
+        # 拡張子 -> 優先順位（TYPE_EXTENSIONSの並び順）
+        priority = {ext: i for i, ext in enumerate(self.TYPE_EXTENSIONS.get(asset_type, []))}
+        extensions = set(priority)
         
         assets = []
         
         if assets_dir.exists():
-            for ext in extensions:
-                for path in assets_dir.rglob(f"*{ext}"):
-                    assets.append(Asset(
-                        path=path,
-                        asset_type=asset_type,
-                        name=path.stem,
-                        size=path.stat().st_size,
-                    ))
+            for entry in _scan_files(str(assets_dir), extensions):
+                path = Path(entry.path)
+                assets.append(Asset(
+                    path=path,
+                    asset_type=asset_type,
+                    name=path.stem,
+                    size=entry.stat().st_size,
+                ))
+            # 走査順はファイルシステム依存なので、拡張子の優先順→パス順に並べて
+            # find_assetの結果を一定にする
+            assets.sort(key=lambda asset: (priority.get(asset.extension, len(priority)), str(asset.path)))
         
         self._cache[asset_type] = assets
         return assets
@@ -130,14 +184,42 @@ class AssetManager:
             types_to_search = list(self.TYPE_EXTENSIONS.keys())
         
         for t in types_to_search:
-            for asset in self.list_assets(t):
-                if (asset.name.lower() == name_lower or 
-                    asset.name.lower() == name_stem or
-                    asset.path.name.lower() == name_lower):
-                    return asset
+            by_name, by_filename = self._get_name_index(t)
+            
+            # 線形探索と同じく、リスト内で最初に一致した素材を返す
+            candidates = [
+                hit for hit in (
+                    by_name.get(name_lower),
+                    by_name.get(name_stem),
+                    by_filename.get(name_lower),
+                )
+                if hit is not None
+            ]
+            if candidates:
+                return min(candidates, key=lambda hit: hit[0])[1]
         
         return None
 
+    def _get_name_index(
+        self,
+        asset_type: str,
+    ) -> Tuple[Dict[str, Tuple[int, Asset]], Dict[str, Tuple[int, Asset]]]:
+        """素材名・ファイル名（小文字）の索引を取得（素材リストが更新されたら作り直す）"""
+        assets = self.list_assets(asset_type)
+        
+        cached = self._name_index.get(asset_type)
+        if cached is not None and cached[0] is assets:
+            return cached[1], cached[2]
+        
+        by_name: Dict[str, Tuple[int, Asset]] = {}
+        by_filename: Dict[str, Tuple[int, Asset]] = {}
+        for i, asset in enumerate(assets):
+            by_name.setdefault(asset.name_lower, (i, asset))
+            by_filename.setdefault(asset.filename_lower, (i, asset))
+        
+        self._name_index[asset_type] = (assets, by_name, by_filename)
+        return by_name, by_filename
+
     def find_assets_by_pattern(
         self,
         pattern: str,
@@ -163,18 +245,49 @@ class AssetManager:
         
         for t in types_to_search:
             for asset in self.list_assets(t):
-                if pattern_lower in asset.name.lower():
+                if pattern_lower in asset.name_lower:
                     results.append(asset)
         
         return results
 
+    def find_assets_by_patterns(
+        self,
+        patterns: List[str],
+        asset_type: Optional[str] = None,
+    ) -> List[Asset]:
+        """
+        複数パターンのいずれかに一致する素材をまとめて検索
+        
+        Args:
+            patterns: 検索パターンのリスト（部分一致）
+            asset_type: 素材タイプ
+        
+        Returns:
+            マッチした素材リスト（重複なし）
+        """
+        if not patterns:
+            return []
+        
+        # 1回の正規表現走査で全パターンを判定
+        regex = re.compile("|".join(re.escape(p) for p in patterns), re.IGNORECASE)
+        
+        if asset_type:
+            types_to_search = [asset_type]
+        else:
+            types_to_search = list(self.TYPE_EXTENSIONS.keys())
+        
+        return [
+            asset
+            for t in types_to_search
+            for asset in self.list_assets(t)
+            if regex.search(asset.name_lower)
+        ]
+
     def get_random_asset(
         self,
         asset_type: str,
     ) -> Optional[Asset]:
         """ランダムに素材を取得"""
-        import random
-        
         assets = self.list_assets(asset_type)
         if assets:
             return random.choice(assets)
@@ -210,8 +323,15 @@ class AssetManager:
         """素材の統計情報を取得"""
         stats = {}
         
-        for asset_type in self.TYPE_EXTENSIONS.keys():
-            assets = self.list_assets(asset_type, use_cache=False)
+        # タイプごとのディレクトリ走査は独立しているので並列に実行
+        with ThreadPoolExecutor(max_workers=len(self.TYPE_EXTENSIONS)) as executor:
+            futures = {
+                asset_type: executor.submit(self.list_assets, asset_type, False)
+                for asset_type in self.TYPE_EXTENSIONS.keys()
+            }
+        
+        for asset_type, future in futures.items():
+            assets = future.result()
             stats[asset_type] = {
                 "count": len(assets),
                 "total_size": sum(a.size for a in assets),
@@ -219,24 +339,65 @@ class AssetManager:
         
         return stats
 
+    # チェックサムを保存する拡張属性名（値は "mtime_ns:size:md5"）
+    CHECKSUM_XATTR = "user.yukkuri.md5"
+
     def compute_checksum(self, path: Path) -> str:
-        """ファイルのチェックサムを計算"""
-        hasher = hashlib.md5()
+        """ファイルのチェックサムを計算（拡張属性に保存した値が有効ならそれを使う）"""
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+            st = os.fstat(f.fileno())
+            stamp = f"{st.st_mtime_ns}:{st.st_size}:"
+            
+            # 前回計算時から変更されていなければ保存済みの値を返す
+            if hasattr(os, "getxattr"):
+                try:
+                    cached = os.getxattr(f.fileno(), self.CHECKSUM_XATTR).decode("ascii")
+                except (OSError, UnicodeDecodeError):
+                    cached = ""
+                if cached.startswith(stamp):
+                    return cached[len(stamp):]
+            
+            # Python 3.11+ はC実装のfile_digestで読み込みとハッシュを行う
+            if hasattr(hashlib, "file_digest"):
+                checksum = hashlib.file_digest(f, "md5").hexdigest()
+            else:
+                hasher = hashlib.md5()
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+                checksum = hasher.hexdigest()
+            
+            if hasattr(os, "setxattr"):
+                try:
+                    os.setxattr(f.fileno(), self.CHECKSUM_XATTR, (stamp + checksum).encode("ascii"))
+                except OSError:
+                    # 拡張属性に非対応・書き込み不可の場合は保存しない
+                    pass
+            
+            return checksum
 
     def find_duplicates(self, asset_type: str) -> Dict[str, List[Path]]:
         """重複ファイルを検出"""
         assets = self.list_assets(asset_type, use_cache=False)
         
-        checksums: Dict[str, List[Path]] = {}
+        # サイズが一致するファイルがないものは重複し得ないのでハッシュ計算を省く
+        by_size: Dict[int, List[Path]] = {}
         for asset in assets:
-            checksum = self.compute_checksum(asset.path)
-            if checksum not in checksums:
-                checksums[checksum] = []
-            checksums[checksum].append(asset.path)
+            by_size.setdefault(asset.size, []).append(asset.path)
+        
+        # ディレクトリ順に並べて読み込みの局所性を保ち、ハッシュ計算は並列化
+        paths = sorted(
+            path
+            for group in by_size.values()
+            if len(group) > 1
+            for path in group
+        )
+        
+        checksums: Dict[str, List[Path]] = {}
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for path, checksum in zip(paths, executor.map(self.compute_checksum, paths)):
+                if checksum not in checksums:
+                    checksums[checksum] = []
+                checksums[checksum].append(path)
         
         # 重複のみ返す
         return {k: v for k, v in checksums.items() if len(v) > 1}
@@ -244,3 +405,4 @@ class AssetManager:
     def clear_cache(self) -> None:
         """キャッシュをクリア"""
         self._cache.clear()
+        self._name_index.clear()
@@ -5,45 +5,15 @@ OpenAI/Gemini APIを使用して台本を自動生成（オプション）
 """
 
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Final, Optional
 
 from ..utils.config import Config
 from ..utils.logger import get_logger
-from .parser import Script, SceneData, LineData, ScriptSettings
+from .parser import Script, ScriptParser, SceneData, LineData, ScriptSettings
 
 
-class ScriptGenerator:
-    """AI台本生成クラス"""
-
-    def __init__(
-        self,
-        provider: Optional[str] = None,
-        api_key: Optional[str] = None,
-        model: Optional[str] = None,
-    ):
-        """
-        Args:
-            provider: プロバイダー ("openai" or "gemini")
-            api_key: API キー
-            model: モデル名
-        """
-        self.logger = get_logger()
-        config = Config.get()
-        
-        self.provider = provider or config.ai.provider
-        self.api_key = api_key or config.ai.api_key or os.getenv("OPENAI_API_KEY")
-        self.model = model or config.ai.model
-        
-        self._client = None
-
-    def is_available(self) -> bool:
-        """AI機能が利用可能か"""
-        config = Config.get()
-        return config.ai.enabled and bool(self.api_key)
-
-    def _get_system_prompt(self) -> str:
-        """システムプロンプトを取得"""
-        return """あなたは「ゆっくり解説動画」の台本作成者です。
+# システムプロンプト（生成ごとに組み立て直さないようモジュール定数にする）
+_SYSTEM_PROMPT: Final[str] = """あなたは「ゆっくり解説動画」の台本作成者です。
 霊夢と魔理沙の掛け合いで視聴者にわかりやすく解説する台本を作成してください。
 
 台本のルール:
@@ -70,6 +40,38 @@ scenes:
 利用可能な表情: normal, smile, sad, angry, surprised, smug, wink, excited, thinking
 """
 
+# OpenAI向けのシステムメッセージ（内容は不変なので使い回す）
+_OPENAI_SYSTEM_MESSAGE: Final[Dict[str, str]] = {"role": "system", "content": _SYSTEM_PROMPT}
+
+
+class ScriptGenerator:
+    """AI台本生成クラス"""
+
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        """
+        Args:
+            provider: プロバイダー ("openai" or "gemini")
+            api_key: API キー
+            model: モデル名
+        """
+        self.logger = get_logger()
+        self.config = Config.get()
+        
+        self.provider = provider or self.config.ai.provider
+        self.api_key = api_key or self.config.ai.api_key or os.getenv("OPENAI_API_KEY")
+        self.model = model or self.config.ai.model
+        
+        self._client = None
+
+    def is_available(self) -> bool:
+        """AI機能が利用可能か"""
+        return self.config.ai.enabled and bool(self.api_key)
+
     def generate(
         self,
         topic: str,
@@ -116,19 +118,37 @@ scenes:
         else:
             raise ValueError(f"未対応のプロバイダー: {self.provider}")
 
+    def _get_openai_client(self):
+        """OpenAIクライアントを取得（初回のみ生成）"""
+        if self._client is None:
+            try:
+                import openai
+            except ImportError:
+                raise ImportError("openaiパッケージをインストールしてください: pip install openai")
+            
+            self._client = openai.OpenAI(api_key=self.api_key)
+        return self._client
+
+    def _get_gemini_model(self):
+        """Geminiモデルを取得（初回のみ生成）"""
+        if self._client is None:
+            try:
+                import google.generativeai as genai
+            except ImportError:
+                raise ImportError("google-generativeaiパッケージをインストールしてください: pip install google-generativeai")
+            
+            genai.configure(api_key=self.api_key)
+            self._client = genai.GenerativeModel(self.model or "gemini-pro")
+        return self._client
+
     def _generate_with_openai(self, prompt: str) -> Script:
         """OpenAI APIで生成"""
-        try:
-            import openai
-        except ImportError:
-            raise ImportError("openaiパッケージをインストールしてください: pip install openai")
-        
-        client = openai.OpenAI(api_key=self.api_key)
+        client = self._get_openai_client()
         
         response = client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": self._get_system_prompt()},
+                _OPENAI_SYSTEM_MESSAGE,
                 {"role": "user", "content": prompt},
             ],
             temperature=0.8,
@@ -139,21 +159,14 @@ scenes:
         # YAMLを抽出
         yaml_content = self._extract_yaml(content)
         
-        from .parser import ScriptParser
         parser = ScriptParser()
         return parser.parse_text(yaml_content)
 
     def _generate_with_gemini(self, prompt: str) -> Script:
         """Gemini APIで生成"""
-        try:
-            import google.generativeai as genai
-        except ImportError:
-            raise ImportError("google-generativeaiパッケージをインストールしてください: pip install google-generativeai")
-        
-        genai.configure(api_key=self.api_key)
-        model = genai.GenerativeModel(self.model or "gemini-pro")
+        model = self._get_gemini_model()
         
-        full_prompt = f"{self._get_system_prompt()}\n\n{prompt}"
+        full_prompt = f"{_SYSTEM_PROMPT}\n\n{prompt}"
         response = model.generate_content(full_prompt)
         
         content = response.text
@@ -161,18 +174,27 @@ scenes:
         # YAMLを抽出
         yaml_content = self._extract_yaml(content)
         
-        from .parser import ScriptParser
         parser = ScriptParser()
         return parser.parse_text(yaml_content)
 
     def _extract_yaml(self, text: str) -> str:
         """テキストからYAMLを抽出"""
-        import re
-        
-        # コードブロック内のYAMLを抽出
-        match = re.search(r"```(?:yaml)?\n(.*?)```", text, re.DOTALL)
-        if match:
-            return match.group(1)
+        # コードブロック内のYAMLを抽出（```yaml または ``` の直後が改行のブロック）
+        start = text.find("```")
+        while start >= 0:
+            body = start + 3
+            if text.startswith("yaml\n", body):
+                body += 5
+            elif text.startswith("\n", body):
+                body += 1
+            else:
+                start = text.find("```", start + 1)
+                continue
+            
+            end = text.find("```", body)
+            if end < 0:
+                break
+            return text[body:end]
         
         # コードブロックがない場合はそのまま返す
         return text
@@ -5,11 +5,24 @@ YAML形式の台本ファイルを読み込む
 """
 
 from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
+import re
 
 import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+
+
+# libyaml があればC実装のローダーを使う
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# シンプル形式の1行: ディレクティブ（@title / @bg / @bgm）またはセリフ（キャラ名: テキスト）
+_LINE_RE = re.compile(r"@(title|bgm|bg)\s+(.*)|(?!#)([^:]*):(.*)", re.DOTALL)
+
+# シンプル形式の表情指定 [表情:smile] / [expr:smile]
+_EXPR_RE = re.compile(r"\[表情:(\w+)\]|\[expr:(\w+)\]")
 
 
 class LineData(BaseModel):
@@ -53,24 +66,27 @@ class Script(BaseModel):
 
     def get_all_lines(self) -> List[LineData]:
         """全セリフを取得"""
-        lines = []
-        for scene in self.scenes:
-            lines.extend(scene.lines)
-        return lines
+        return list(chain.from_iterable(scene.lines for scene in self.scenes))
 
     def get_characters(self) -> List[str]:
         """登場キャラクター一覧"""
-        characters = set()
-        for scene in self.scenes:
-            for line in scene.lines:
-                characters.add(line.character)
-        return list(characters)
+        # 登場順を保ったまま重複を除く
+        return list(dict.fromkeys(
+            line.character for scene in self.scenes for line in scene.lines
+        ))
 
     def get_total_lines(self) -> int:
         """総セリフ数"""
         return sum(len(scene.lines) for scene in self.scenes)
 
 
+# シーン一覧をまとめて検証するアダプター（1回の呼び出しで全シーン・全セリフを検証）
+_SCENE_LIST_ADAPTER = TypeAdapter(List[SceneData])
+
+# タイトルの検証用（model_constructでは検証されないため）
+_TITLE_ADAPTER = TypeAdapter(str)
+
+
 class ScriptParser:
     """台本パーサー"""
 
@@ -89,8 +105,15 @@ class ScriptParser:
         """
         path = Path(path)
         
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        # 同じ内容（パス・更新時刻・サイズが一致）なら解析済みの台本を返す
+        st = path.stat()
+        return _parse_file_memo(str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+    def _parse_file_uncached(self, path: Path) -> Script:
+        """YAMLファイルを解析する（キャッシュなし）"""
+        # バイナリで渡し、UTF-8のデコードはlibyaml側で行う
+        with open(path, "rb") as f:
+            data = yaml.load(f, Loader=_YAML_LOADER)
         
         return self.parse_dict(data)
 
@@ -110,31 +133,32 @@ class ScriptParser:
             settings_data["resolution"] = tuple(settings_data["resolution"])
         settings = ScriptSettings(**settings_data)
         
-        # シーン
-        scenes = []
+        # シーン（辞書のまま正規化してから一括で検証する）
+        scene_dicts = []
         for scene_data in data.get("scenes", []):
-            lines = []
-            for line_data in scene_data.get("lines", []):
+            lines = scene_data.get("lines", [])
+            for line_data in lines:
                 if isinstance(line_data.get("effects"), str):
                     line_data["effects"] = [line_data["effects"]]
-                lines.append(LineData(**line_data))
             
-            scene = SceneData(
-                id=scene_data.get("id", f"scene_{len(scenes) + 1}"),
-                background=scene_data.get("background"),
-                bgm=scene_data.get("bgm"),
-                bgm_volume=scene_data.get("bgm_volume", 0.3),
-                lines=lines,
-                transition=scene_data.get("transition"),
-                transition_duration=scene_data.get("transition_duration", 0.5),
-            )
-            scenes.append(scene)
+            scene_dicts.append({
+                "id": scene_data.get("id", f"scene_{len(scene_dicts) + 1}"),
+                "background": scene_data.get("background"),
+                "bgm": scene_data.get("bgm"),
+                "bgm_volume": scene_data.get("bgm_volume", 0.3),
+                "lines": lines,
+                "transition": scene_data.get("transition"),
+                "transition_duration": scene_data.get("transition_duration", 0.5),
+            })
         
-        return Script(
-            title=data.get("title", "Untitled"),
+        scenes = _SCENE_LIST_ADAPTER.validate_python(scene_dicts)
+        
+        # 設定・シーン・タイトルは検証済み、メタデータは任意の辞書なので再検証しない
+        return Script.model_construct(
+            title=_TITLE_ADAPTER.validate_python(data.get("title", "Untitled")),
             settings=settings,
             scenes=scenes,
-            metadata=data.get("metadata", {}),
+            metadata=data.get("metadata") or {},
         )
 
     def parse_text(self, text: str) -> Script:
@@ -147,7 +171,7 @@ class ScriptParser:
         Returns:
             台本オブジェクト
         """
-        data = yaml.safe_load(text)
+        data = yaml.load(text, Loader=_YAML_LOADER)
         return self.parse_dict(data)
 
     def parse_simple_format(self, text: str) -> Script:
@@ -172,9 +196,12 @@ class ScriptParser:
         """
         lines_raw = text.strip().split("\n")
         
-        title = "Untitled"
-        background = None
-        bgm = None
+        # ディレクティブ名 -> 値
+        directives: Dict[str, Optional[str]] = {
+            "title": "Untitled",
+            "bg": None,
+            "bgm": None,
+        }
         script_lines: List[LineData] = []
         
         # キャラクター名のエイリアス
@@ -189,48 +216,54 @@ class ScriptParser:
             if not line:
                 continue
             
-            # メタデータ
-            if line.startswith("@title "):
-                title = line[7:].strip()
-            elif line.startswith("@bg "):
-                background = line[4:].strip()
-            elif line.startswith("@bgm "):
-                bgm = line[5:].strip()
-            elif ":" in line and not line.startswith("#"):
-                # セリフ行をパース
-                parts = line.split(":", 1)
-                if len(parts) == 2:
-                    char_name = parts[0].strip()
-                    text_part = parts[1].strip()
-                    
-                    # エイリアス変換
-                    character = char_aliases.get(char_name, char_name.lower())
-                    
-                    # 表情指定を抽出 [表情:smile]
-                    expression = "normal"
-                    if "[" in text_part and "]" in text_part:
-                        import re
-                        match = re.search(r"\[表情:(\w+)\]|\[expr:(\w+)\]", text_part)
-                        if match:
-                            expression = match.group(1) or match.group(2)
-                            text_part = re.sub(r"\[表情:\w+\]|\[expr:\w+\]", "", text_part).strip()
-                    
-                    script_lines.append(LineData(
-                        character=character,
-                        text=text_part,
-                        expression=expression,
-                    ))
+            # 1回のマッチでディレクティブかセリフかを判定
+            match = _LINE_RE.match(line)
+            if match is None:
+                continue
+            
+            key, value, char_name, text_part = match.groups()
+            if key is not None:
+                # メタデータ
+                directives[key] = value.strip()
+                continue
+            
+            # セリフ行をパース
+            char_name = char_name.strip()
+            text_part = text_part.strip()
+            
+            # エイリアス変換
+            character = char_aliases.get(char_name, char_name.lower())
+            
+            # 表情指定を抽出 [表情:smile]
+            expression = "normal"
+            if "[" in text_part and "]" in text_part:
+                expr_match = _EXPR_RE.search(text_part)
+                if expr_match:
+                    expression = expr_match.group(1) or expr_match.group(2)
+                    text_part = _EXPR_RE.sub("", text_part).strip()
+            
+            script_lines.append(LineData(
+                character=character,
+                text=text_part,
+                expression=expression,
+            ))
         
         # シーンを作成
         scene = SceneData(
             id="main",
-            background=background,
-            bgm=bgm,
+            background=directives["bg"],
+            bgm=directives["bgm"],
             lines=script_lines,
         )
         
         return Script(
-            title=title,
+            title=directives["title"],
             settings=ScriptSettings(),
             scenes=[scene],
         )
+
+
+@lru_cache(maxsize=32)
+def _parse_file_memo(path: str, mtime_ns: int, size: int) -> Script:
+    """parse_file のプロセス内キャッシュ（更新時刻・サイズが変われば別キーになる）"""
+    return ScriptParser()._parse_file_uncached(Path(path))
@@ -1,5 +1,6 @@
 """Utilities module"""
 from .config import Config
 from .logger import setup_logger, get_logger
+from .fonts import get_font
 
-__all__ = ["Config", "setup_logger", "get_logger"]
+__all__ = ["Config", "setup_logger", "get_logger", "get_font"]
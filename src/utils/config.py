@@ -5,16 +5,21 @@ YAML設定ファイルの読み込みと管理を行う
 """
 
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, ClassVar, Dict, Optional
 import yaml
 from pydantic import BaseModel, Field
 
 
+# libyaml があればC実装のローダーを使う
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
 class VoicevoxConfig(BaseModel):
     """VOICEVOX設定"""
     url: str = "http://localhost:50021"
     default_speaker: int = 0
     speakers: Dict[str, int] = Field(default_factory=lambda: {"reimu": 0, "marisa": 1})
+    concurrency: int = 4  # 音声生成の同時リクエスト数
 
 
 class VideoConfig(BaseModel):
@@ -25,6 +30,7 @@ class VideoConfig(BaseModel):
     audio_codec: str = "aac"
     bitrate: str = "8000k"
     preset: str = "medium"
+    image_cache_size: int = 64  # デコード済み画像のキャッシュ数
 
 
 class SubtitleConfig(BaseModel):
@@ -83,8 +89,9 @@ class Config(BaseModel):
     timing: TimingConfig = Field(default_factory=TimingConfig)
     ai: AIConfig = Field(default_factory=AIConfig)
 
-    _instance: Optional["Config"] = None
-    _config_path: Optional[Path] = None
+    # シングルトン（ClassVarにしてpydanticのプライベート属性として扱われないようにする）
+    _instance: ClassVar[Optional["Config"]] = None
+    _config_path: ClassVar[Optional[Path]] = None
 
     @classmethod
     def load(cls, config_path: Optional[Path] = None) -> "Config":
@@ -96,8 +103,9 @@ class Config(BaseModel):
             # デフォルト設定を返す
             return cls()
         
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        # バイナリで渡し、UTF-8のデコードはlibyaml側で行う
+        with open(config_path, "rb") as f:
+            data = yaml.load(f, Loader=_YAML_LOADER)
         
         # characters の変換
         if "characters" in data:
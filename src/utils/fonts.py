@@ -0,0 +1,27 @@
+"""
+フォント管理モジュール
+
+フォントの読み込み結果をプロセス内で共有する
+"""
+
+from functools import lru_cache
+
+from PIL import ImageFont
+
+
+@lru_cache(maxsize=16)
+def get_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    TrueTypeフォントを取得する
+    
+    同じパス・サイズの組み合わせは一度だけ読み込み、以降は同じ
+    フォントオブジェクト（とFreeTypeのグリフキャッシュ）を再利用する
+    
+    Args:
+        path: フォントファイルパス
+        size: フォントサイズ
+    
+    Returns:
+        フォントオブジェクト
+    """
+    return ImageFont.truetype(path, size)
@@ -5,6 +5,7 @@
 """
 
 import logging
+import os
 import sys
 from pathlib import Path
 from typing import Optional
@@ -21,8 +22,21 @@ def setup_logger(
     name: str = "yukkuri",
     level: int = logging.INFO,
     log_file: Optional[Path] = None,
+    pretty: Optional[bool] = None,
 ) -> logging.Logger:
-    """ロガーをセットアップする"""
+    """
+    ロガーをセットアップする
+    
+    Args:
+        name: ロガー名
+        level: ログレベル
+        log_file: ログファイル（オプション）
+        pretty: Richで装飾して出力するか（指定なしで端末のときのみ）。
+            環境変数 YUKKURI_PLAIN_LOG を設定すると常にプレーン出力
+    
+    Returns:
+        ロガー
+    """
     global _logger
     
     logger = logging.getLogger(name)
@@ -31,15 +45,27 @@ def setup_logger(
     # 既存のハンドラをクリア
     logger.handlers.clear()
     
-    # Rich ハンドラ（コンソール出力）
-    rich_handler = RichHandler(
-        console=console,
-        show_time=True,
-        show_path=False,
-        rich_tracebacks=True,
-    )
-    rich_handler.setLevel(level)
-    logger.addHandler(rich_handler)
+    if os.environ.get("YUKKURI_PLAIN_LOG", "") not in ("", "0"):
+        pretty = False
+    elif pretty is None:
+        pretty = sys.stderr.isatty()
+    
+    if pretty:
+        # Rich ハンドラ（コンソール出力）
+        console_handler: logging.Handler = RichHandler(
+            console=console,
+            show_time=True,
+            show_path=False,
+            rich_tracebacks=True,
+        )
+    else:
+        # プレーンなハンドラ（パイプ・リダイレクト時はRichの装飾処理を省く）
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(message)s", "%H:%M:%S")
+        )
+    console_handler.setLevel(level)
+    logger.addHandler(console_handler)
     
     # ファイルハンドラ（オプション）
     if log_file:
@@ -2,5 +2,6 @@
 from .timeline import Timeline, TimelineItem
 from .renderer import VideoRenderer
 from .subtitle import SubtitleGenerator
+from .compositor import FrameCompositor
 
-__all__ = ["Timeline", "TimelineItem", "VideoRenderer", "SubtitleGenerator"]
+__all__ = ["Timeline", "TimelineItem", "VideoRenderer", "SubtitleGenerator", "FrameCompositor"]
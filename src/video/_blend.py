@@ -0,0 +1,61 @@
+"""
+アルファ合成カーネル
+
+numbaがあれば行単位で並列化したJITカーネルを使い、なければNumPyで合成する
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange  # オプション: JITコンパイルによる並列合成
+except ImportError:
+    njit = None
+
+
+def _blend_numpy(
+    region: np.ndarray,
+    color: np.ndarray,
+    inv_alpha: np.ndarray,
+    fading: float,
+) -> None:
+    """NumPyによる合成（numbaがない場合）"""
+    if fading < 1.0:
+        region[...] = color * fading + region * inv_alpha
+    else:
+        region[...] = color + region * inv_alpha
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _blend_jit(region, color, inv_alpha, fading):
+        """行ごとに並列化したアルファ合成"""
+        height, width = region.shape[0], region.shape[1]
+        for y in prange(height):
+            for x in range(width):
+                inv = inv_alpha[y, x, 0]
+                for c in range(3):
+                    value = color[y, x, c] * fading + region[y, x, c] * inv
+                    region[y, x, c] = np.uint8(min(value, 255.0))
+else:
+    _blend_jit = None
+
+
+def alpha_over(
+    region: np.ndarray,
+    color: np.ndarray,
+    inv_alpha: np.ndarray,
+    fading: float = 1.0,
+) -> None:
+    """
+    アルファ乗算済みの画像を描画先に重ねる（region = color * fading + region * inv_alpha）
+
+    Args:
+        region: 描画先 (HxWx3, uint8)。直接書き換える
+        color: アルファ乗算済みRGB (HxWx3, float32)
+        inv_alpha: 1 - アルファ (HxWx1, float32)
+        fading: 不透明度（フェード用、0.0〜1.0）
+    """
+    if _blend_jit is not None:
+        _blend_jit(region, color, inv_alpha, np.float32(fading))
+    else:
+        _blend_numpy(region, color, inv_alpha, fading)
@@ -0,0 +1,184 @@
+"""
+フレーム合成モジュール
+
+背景・立ち絵・字幕をNumPyで直接合成し、MoviePyを介さずにフレームを生成する
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ._blend import alpha_over
+
+
+@dataclass
+class Sprite:
+    """
+    合成用スプライト
+
+    画面外にはみ出す部分は追加時に切り落とし、
+    描画先・描画元の範囲を事前に計算しておく
+    """
+    color: np.ndarray              # 不透明: RGB(uint8)、半透明: アルファ乗算済みRGB(float32)
+    inv_alpha: Optional[np.ndarray]  # 1 - アルファ (float32, HxWx1)、不透明ならNone
+    dst: Tuple[slice, slice]       # フレーム上の描画範囲
+    start_time: float
+    end_time: float
+    fade_in: float = 0.0
+    fade_out: float = 0.0
+
+
+class FrameCompositor:
+    """NumPyフレーム合成クラス"""
+
+    def __init__(
+        self,
+        resolution: Tuple[int, int],
+        base_color: Tuple[int, int, int] = (0, 0, 0),
+    ):
+        """
+        Args:
+            resolution: 解像度 (width, height)
+            base_color: 何も描画されない部分の色 (RGB)
+        """
+        self.resolution = resolution
+        self.base_color = np.array(base_color, dtype=np.uint8)
+        
+        width, height = resolution
+        self._frame = np.empty((height, width, 3), dtype=np.uint8)
+        
+        self._background_source: Optional[Callable[[float], np.ndarray]] = None
+        self._sprites: List[Sprite] = []
+        # 同じ画像・同じ位置のスプライトは合成用データを共有する
+        # (id(画像), x, y) -> (画像, color, inv_alpha)。画像は参照を保持してidの再利用を防ぐ
+        self._prepared: Dict[Tuple[int, int, int], Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = {}
+        # 表示判定用の開始・終了時間（スプライト追加後、最初のrenderで作り直す）
+        self._starts = np.empty(0)
+        self._ends = np.empty(0)
+
+    def set_background_source(self, make_frame: Callable[[float], np.ndarray]) -> None:
+        """
+        時間ごとに背景フレームを返す関数を設定（スクロールテキスト背景など）
+        
+        Args:
+            make_frame: 時間（秒）を受け取り HxWx3 のuint8配列を返す関数
+        """
+        self._background_source = make_frame
+
+    def add_sprite(
+        self,
+        image: np.ndarray,
+        position: Tuple[int, int],
+        start_time: float,
+        end_time: float,
+        fade_in: float = 0.0,
+        fade_out: float = 0.0,
+    ) -> Optional[Sprite]:
+        """
+        スプライトを追加（追加順に手前へ重ねる）
+        
+        Args:
+            image: RGB または RGBA のuint8配列
+            position: 左上座標 (x, y)
+            start_time: 表示開始時間（秒）
+            end_time: 表示終了時間（秒）
+            fade_in: フェードイン時間（黒から）
+            fade_out: フェードアウト時間（黒へ）
+        
+        Returns:
+            追加したスプライト（画面外で描画されない場合はNone）
+        """
+        width, height = self.resolution
+        x, y = position
+        h, w = image.shape[:2]
+        
+        # 画面内に収まる範囲に切り詰める
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, width), min(y + h, height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        
+        key = (id(image), x, y)
+        prepared = self._prepared.get(key)
+        if prepared is not None:
+            _, color, inv_alpha = prepared
+        else:
+            src = image[y0 - y:y1 - y, x0 - x:x1 - x]
+            
+            # 完全に不透明なRGBA（背景画像など）はアルファ計算を省いてコピーで描画する
+            if src.shape[2] == 4 and src[..., 3].min() == 255:
+                src = src[..., :3]
+            
+            if src.shape[2] == 4:
+                alpha = src[..., 3:4].astype(np.float32) / 255.0
+                color = src[..., :3].astype(np.float32) * alpha
+                inv_alpha = 1.0 - alpha
+            else:
+                color = np.ascontiguousarray(src)
+                inv_alpha = None
+            self._prepared[key] = (image, color, inv_alpha)
+        
+        sprite = Sprite(
+            color=color,
+            inv_alpha=inv_alpha,
+            dst=(slice(y0, y1), slice(x0, x1)),
+            start_time=start_time,
+            end_time=end_time,
+            fade_in=fade_in,
+            fade_out=fade_out,
+        )
+        self._sprites.append(sprite)
+        return sprite
+
+    def clear(self) -> None:
+        """スプライトをすべて取り除く（フレームバッファはそのまま再利用する）"""
+        self._sprites.clear()
+        self._prepared.clear()
+        self._starts = np.empty(0)
+        self._ends = np.empty(0)
+
+    def render(self, t: float) -> np.ndarray:
+        """
+        指定時間のフレームを合成
+        
+        返す配列は内部バッファなので、次の render 呼び出しで上書きされる
+        
+        Args:
+            t: 時間（秒）
+        
+        Returns:
+            HxWx3 のuint8フレーム
+        """
+        frame = self._frame
+        
+        if self._background_source is not None:
+            frame[...] = self._background_source(t)
+        else:
+            frame[...] = self.base_color
+        
+        if len(self._starts) != len(self._sprites):
+            self._starts = np.array([s.start_time for s in self._sprites], dtype=np.float64)
+            self._ends = np.array([s.end_time for s in self._sprites], dtype=np.float64)
+        
+        # 表示中のスプライトを追加順に重ねる
+        active = np.flatnonzero((self._starts <= t) & (t < self._ends))
+        for index in active:
+            sprite = self._sprites[index]
+            region = frame[sprite.dst]
+            
+            fading = 1.0
+            if sprite.fade_in > 0:
+                fading = min(fading, (t - sprite.start_time) / sprite.fade_in)
+            if sprite.fade_out > 0:
+                fading = min(fading, (sprite.end_time - t) / sprite.fade_out)
+            
+            if sprite.inv_alpha is None:
+                if fading < 1.0:
+                    region[...] = sprite.color * fading
+                else:
+                    region[...] = sprite.color
+            else:
+                alpha_over(region, sprite.color, sprite.inv_alpha, fading)
+        
+        return frame
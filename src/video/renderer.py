@@ -4,8 +4,12 @@
 MoviePyを使用して動画を生成する
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+import os
+import subprocess
 import tempfile
 
 from moviepy.editor import (
@@ -22,12 +26,193 @@ from moviepy.video.fx.all import fadein, fadeout
 from PIL import Image
 import numpy as np
 
+try:
+    import av  # オプション: PyAVによるプロセス内エンコード
+except ImportError:
+    av = None
+
+from .compositor import FrameCompositor
 from .timeline import Timeline, TimelineItem, ItemType
 from .subtitle import SubtitleGenerator
 from ..utils.config import Config
+from ..utils.fonts import get_font
 from ..utils.logger import get_logger
 
 
+# デコード済み画像のLRUキャッシュ（サイズは設定から決めるため初回使用時に作成）
+_rgba_cache: Optional[Callable[[str, int], Image.Image]] = None
+
+
+def _decode_rgba(path: str, mtime_ns: int) -> Image.Image:
+    """画像をRGBAでデコード（mtime_nsはキャッシュキー用）"""
+    with Image.open(path) as img:
+        return img.convert("RGBA")
+
+
+def _load_rgba(path: Path) -> Image.Image:
+    """
+    画像をRGBAで読み込む（パスと更新時刻が同じならデコード済みの画像を再利用）
+    
+    返す画像は共有されるため、呼び出し側で直接書き換えないこと
+    
+    Args:
+        path: 画像パス
+    
+    Returns:
+        RGBA画像
+    """
+    global _rgba_cache
+    if _rgba_cache is None:
+        _rgba_cache = lru_cache(maxsize=Config.get().video.image_cache_size)(_decode_rgba)
+    return _rgba_cache(str(path), path.stat().st_mtime_ns)
+
+
+def _parse_bitrate(bitrate: str) -> int:
+    """"8000k" / "8M" 形式のビットレートをbps に変換"""
+    units = {"k": 1_000, "m": 1_000_000}
+    suffix = bitrate[-1:].lower()
+    if suffix in units:
+        return int(float(bitrate[:-1]) * units[suffix])
+    return int(bitrate)
+
+
+def _existing_paths(paths: Iterable[Optional[Path]]) -> Set[Path]:
+    """
+    存在するパスをまとめて確認（ディレクトリごとに1回scandirし、名前が一致しないものだけstatする）
+    
+    Args:
+        paths: 確認するパス（Noneは無視）
+    
+    Returns:
+        存在するパスの集合
+    """
+    by_dir: Dict[Path, List[Path]] = {}
+    for path in paths:
+        if path is not None:
+            by_dir.setdefault(path.parent, []).append(path)
+    
+    existing: Set[Path] = set()
+    for directory, members in by_dir.items():
+        try:
+            with os.scandir(directory) as it:
+                names = {entry.name for entry in it}
+        except OSError:
+            continue  # ディレクトリがない
+        # 名前が一致すれば存在確定。一致しなくても大文字小文字を区別しない
+        # ファイルシステムでは存在しうるので、その場合だけstatで確認する
+        existing.update(
+            path for path in members
+            if path.name in names or path.exists()
+        )
+    return existing
+
+
+def _timeline_existing_paths(timeline: Timeline) -> Set[Path]:
+    """タイムライン中の画像・音声ファイルのうち存在するもの"""
+    return _existing_paths(
+        path
+        for item in timeline.items
+        for path in (item.image_path, item.audio_path)
+    )
+
+
+# ハードウェアエンコーダー（優先順）: コーデック -> (既定プリセット, 追加FFmpeg引数)
+# VideoToolboxはプリセットを持たない（指定しても無視される）
+_HW_ENCODERS: Dict[str, Tuple[str, List[str]]] = {
+    "h264_nvenc": ("p4", ["-rc", "vbr", "-cq", "23"]),
+    "h264_videotoolbox": ("medium", []),
+    "h264_qsv": ("faster", []),
+}
+
+# 速度と画質のバランス: モード -> (x264プリセット, NVENCプリセット, CRF/CQ値)
+_PERFORMANCE_MODES: Dict[str, Tuple[str, str, int]] = {
+    "fast": ("veryfast", "p2", 26),
+    "balanced": ("faster", "p4", 23),
+    "quality": ("medium", "p6", 20),
+}
+
+
+@lru_cache(maxsize=None)
+def _detect_hw_encoder() -> Optional[str]:
+    """
+    使えるハードウェアエンコーダーを探す（1回だけ確認）
+    
+    FFmpegのビルドに含まれていてもドライバやGPUがなければ使えないため、
+    -encoders の一覧に載っているものを短い試し書きで確認する
+    
+    Returns:
+        コーデック名（見つからなければNone）
+    """
+    from moviepy.config import get_setting
+    
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    try:
+        listed = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    
+    for codec in _HW_ENCODERS:
+        if f" {codec} " not in listed:
+            continue
+        cmd = [
+            ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+            "-c:v", codec, "-f", "null", "-",
+        ]
+        try:
+            if subprocess.run(cmd, capture_output=True, timeout=10).returncode == 0:
+                return codec
+        except (OSError, subprocess.SubprocessError):
+            continue
+    return None
+
+
+def _resolve_encoder(
+    codec: Optional[str],
+    preset: Optional[str],
+    performance_mode: Optional[str] = None,
+) -> Tuple[str, str, List[str]]:
+    """
+    動画コーデック・プリセット・追加FFmpeg引数を決める
+    
+    Args:
+        codec: 動画コーデック（"auto"またはNoneでハードウェアエンコーダーを探し、なければlibx264）
+        preset: エンコードプリセット（Noneでコーデックに応じた既定値）
+        performance_mode: "fast" / "balanced" / "quality"（指定時は品質固定(CRF/CQ)でエンコード）
+    
+    Returns:
+        (コーデック, プリセット, 追加FFmpeg引数)
+    """
+    if codec is None or codec == "auto":
+        codec = _detect_hw_encoder() or "libx264"
+    
+    if performance_mode is not None:
+        if performance_mode not in _PERFORMANCE_MODES:
+            raise ValueError(f"不明なperformance_mode: {performance_mode}")
+        x264_preset, nvenc_preset, quality = _PERFORMANCE_MODES[performance_mode]
+        if codec.endswith("_nvenc"):
+            return codec, preset or nvenc_preset, ["-rc", "vbr", "-cq", str(quality)]
+        if codec.endswith("_qsv"):
+            return codec, preset or x264_preset, ["-global_quality", str(quality)]
+        if codec.endswith("_videotoolbox"):
+            # 品質固定モードがないため、ビットレート指定のまま
+            return codec, preset or "medium", []
+        return codec, preset or x264_preset, ["-crf", str(quality)]
+    
+    if codec in _HW_ENCODERS:
+        default_preset, params = _HW_ENCODERS[codec]
+        return codec, preset or default_preset, list(params)
+    if codec.endswith("_nvenc"):
+        default_preset, params = _HW_ENCODERS["h264_nvenc"]
+        return codec, preset or default_preset, list(params)
+    return codec, preset or "faster", []
+
+
 class VideoRenderer:
     """動画レンダリングクラス"""
 
@@ -50,6 +235,21 @@ class VideoRenderer:
         
         # 一時ファイル管理
         self._temp_files: List[Path] = []
+        
+        # プレビュー用の変形済み画像 (パス, 更新時刻, サイズ指定) -> RGBA配列
+        self._preview_images: Dict[Tuple[str, Any], np.ndarray] = {}
+        
+        # 画面サイズに変換済みの背景 (パス, 更新時刻, 解像度) -> RGB配列
+        self._background_images: Dict[Tuple[str, int, Tuple[int, int]], np.ndarray] = {}
+        
+        # 反転・拡縮済みの立ち絵 (パス, 更新時刻, スケール, 反転) -> RGBA画像
+        self._character_images: Dict[Tuple[str, int, float, bool], Image.Image] = {}
+        
+        # プレビュー用の合成器（フレームバッファを呼び出しごとに確保しない）
+        self._preview_compositor: Optional[FrameCompositor] = None
+        
+        # 動画背景の読み込み済みクリップ（同じ動画はffprobe・デコーダー起動を1回で済ませる）
+        self._video_sources: Dict[Path, VideoFileClip] = {}
 
     def _cleanup_temp_files(self) -> None:
         """一時ファイルを削除"""
@@ -60,6 +260,49 @@ class VideoRenderer:
                 self.logger.warning(f"一時ファイル削除失敗: {path}: {e}")
         self._temp_files.clear()
 
+    def _close_video_sources(self) -> None:
+        """読み込み済みの動画背景クリップを閉じる"""
+        for clip in self._video_sources.values():
+            try:
+                clip.close()
+            except Exception as e:
+                self.logger.warning(f"動画クリップのクローズ失敗: {e}")
+        self._video_sources.clear()
+
+    def _clear_image_caches(self) -> None:
+        """変形済み画像のキャッシュを捨てる"""
+        self._preview_images.clear()
+        self._background_images.clear()
+        self._character_images.clear()
+        self._preview_compositor = None
+
+    def close(self) -> None:
+        """レンダリングで確保したリソース（一時ファイル・動画クリップ・画像キャッシュ）を解放"""
+        self._close_video_sources()
+        self._cleanup_temp_files()
+        self._clear_image_caches()
+
+    def _get_background_array(self, path: Path) -> np.ndarray:
+        """
+        画面サイズにリサイズした背景画像を取得（同じ画像は1回だけリサイズ）
+        
+        Args:
+            path: 画像パス
+        
+        Returns:
+            RGB配列 (HxWx3, uint8)
+        """
+        path = Path(path)
+        key = (str(path), path.stat().st_mtime_ns, tuple(self.resolution))
+        array = self._background_images.get(key)
+        if array is None:
+            img = _load_rgba(path).convert("RGB")
+            # 背景は全面を覆うため、速いBILINEARで十分
+            img = img.resize(self.resolution, Image.Resampling.BILINEAR)
+            array = np.asarray(img)
+            self._background_images[key] = array
+        return array
+
     def create_background_clip(
         self,
         source: Union[str, Path, Tuple[int, int, int]],
@@ -85,8 +328,12 @@ class VideoRenderer:
         
         path = Path(source)
         if path.suffix.lower() in [".mp4", ".mov", ".avi", ".webm"]:
-            # 動画背景
-            clip = VideoFileClip(str(path))
+            # 動画背景（同じ動画は読み込み済みのクリップから切り出す）
+            key = path.resolve()
+            clip = self._video_sources.get(key)
+            if clip is None:
+                clip = VideoFileClip(str(path))
+                self._video_sources[key] = clip
             if clip.duration < duration:
                 # ループ
                 clip = clip.loop(duration=duration)
@@ -95,10 +342,7 @@ class VideoRenderer:
             return clip.resize(self.resolution)
         else:
             # 画像背景 - Pillowでリサイズしてから読み込み
-            img = Image.open(path).convert("RGB")
-            img = img.resize(self.resolution, Image.Resampling.LANCZOS)
-            img_array = np.array(img)
-            return ImageClip(img_array, duration=duration)
+            return ImageClip(self._get_background_array(path), duration=duration)
 
     def create_character_clip(
         self,
@@ -109,6 +353,7 @@ class VideoRenderer:
         fade_in: float = 0.0,
         fade_out: float = 0.0,
         flip_horizontal: bool = False,
+        image: Optional[Image.Image] = None,
     ) -> ImageClip:
         """
         キャラクター立ち絵クリップを作成
@@ -121,22 +366,18 @@ class VideoRenderer:
             fade_in: フェードイン時間
             fade_out: フェードアウト時間
             flip_horizontal: 左右反転（Trueで右向きに）
+            image: 反転・拡縮済みの画像（指定時は読み込み・変形を省略）
         
         Returns:
             キャラクタークリップ
         """
-        # Pillowで読み込み（RGBAサポート）
-        img = Image.open(image_path).convert("RGBA")
-        
-        # 左右反転
-        if flip_horizontal:
-            img = img.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
-        
-        if scale != 1.0:
-            new_size = (int(img.width * scale), int(img.height * scale))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        if image is not None:
+            img = image
+        else:
+            img = self._load_character_image(image_path, scale, flip_horizontal)
         
-        img_array = np.array(img)
+        # ImageClipは配列を書き換えないので、コピーせずPillowのバッファを参照する
+        img_array = np.asarray(img)
         clip = ImageClip(img_array, duration=duration, transparent=True)
         
         # 位置設定（中心基準から左上を計算）
@@ -152,12 +393,77 @@ class VideoRenderer:
         
         return clip
 
+    def _load_character_image(
+        self,
+        image_path: Path,
+        scale: float = 1.0,
+        flip_horizontal: bool = False,
+    ) -> Image.Image:
+        """立ち絵画像を読み込み、反転・拡縮する（同じ組み合わせは1回だけ変形）"""
+        image_path = Path(image_path)
+        key = (str(image_path), image_path.stat().st_mtime_ns, scale, flip_horizontal)
+        cached = self._character_images.get(key)
+        if cached is not None:
+            return cached
+        
+        # Pillowで読み込み（RGBAサポート）
+        img = _load_rgba(image_path)
+        
+        # 左右反転
+        if flip_horizontal:
+            img = img.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        
+        if scale != 1.0:
+            new_size = (int(img.width * scale), int(img.height * scale))
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        
+        self._character_images[key] = img
+        return img
+
+    def _prepare_character_images(
+        self,
+        items: List[TimelineItem],
+    ) -> List[Image.Image]:
+        """
+        立ち絵アイテムごとの反転・拡縮済み画像を用意する
+        
+        同じ組み合わせ（画像パス・スケール・反転）は1回だけ処理し、
+        異なる組み合わせはスレッドで並列に読み込む（Pillowの処理中はGILが外れる）
+        
+        Args:
+            items: 立ち絵アイテム
+        
+        Returns:
+            画像のリスト（itemsと同じ順）
+        """
+        def variant_key(item: TimelineItem) -> tuple:
+            return (str(item.image_path), item.scale, item.flip_horizontal)
+        
+        def load(item: TimelineItem) -> Image.Image:
+            return self._load_character_image(
+                item.image_path,
+                item.scale,
+                item.flip_horizontal,
+            )
+        
+        unique_items = list({variant_key(item): item for item in reversed(items)}.values())
+        if not unique_items:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(unique_items))) as executor:
+            images = dict(zip(
+                (variant_key(item) for item in unique_items),
+                executor.map(load, unique_items),
+            ))
+        return [images[variant_key(item)] for item in items]
+
     def create_subtitle_clip(
         self,
         text: str,
         duration: float,
         position: str = "bottom",
         margin_bottom: int = 80,
+        image: Optional[np.ndarray] = None,
     ) -> ImageClip:
         """
         字幕クリップを作成
@@ -167,29 +473,31 @@ class VideoRenderer:
             duration: 持続時間
             position: 位置（bottom, center, top）
             margin_bottom: 下マージン
+            image: 生成済みの字幕画像（RGBA配列、指定時は生成を省略）
         
         Returns:
             字幕クリップ
         """
-        # 字幕画像を生成
-        max_width = int(self.resolution[0] * 0.9)
-        subtitle_img = self.subtitle_generator.create_subtitle_image(
-            text,
-            max_width=max_width,
-        )
-        
-        # PIL ImageをNumPy配列に変換
-        img_array = np.array(subtitle_img)
-        
-        clip = ImageClip(img_array, duration=duration, transparent=True)
+        if image is not None:
+            img_array = image
+        else:
+            # 同じテキストの字幕はSubtitleGenerator側のキャッシュで描画を省略する
+            img = self.subtitle_generator.create_subtitle_image(
+                text,
+                max_width=int(self.resolution[0] * 0.9),
+            )
+            img_array = np.asarray(img)
         
-        # 位置設定
+        # 位置設定（高さはクリップではなく画像から求める）
         if position == "bottom":
-            clip = clip.set_position(("center", self.resolution[1] - clip.size[1] - margin_bottom))
+            clip_position = ("center", self.resolution[1] - img_array.shape[0] - margin_bottom)
         elif position == "top":
-            clip = clip.set_position(("center", margin_bottom))
+            clip_position = ("center", margin_bottom)
         else:  # center
-            clip = clip.set_position("center")
+            clip_position = "center"
+        
+        clip = ImageClip(img_array, duration=duration, transparent=True)
+        clip = clip.set_position(clip_position)
         
         return clip
 
@@ -219,7 +527,7 @@ class VideoRenderer:
         
         # フォント読み込み
         try:
-            font = ImageFont.truetype("/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc", font_size)
+            font = get_font("/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc", font_size)
         except:
             font = ImageFont.load_default()
         
@@ -235,61 +543,220 @@ class VideoRenderer:
         # スクロール範囲: 画面下端から始まり、テキストが全部上に消えるまで
         scroll_range = self.resolution[1] + total_text_height
         
+        # スクロール全体を縦長の帯として1回だけ描画する
+        # 上下に画面1枚分の余白を付け、どの位置でも画面の高さ分を切り出せるようにする
+        width, height = self.resolution
+        strip = Image.new("RGB", (width, height * 2 + total_text_height), bg_color)
+        draw = ImageDraw.Draw(strip)
+        for index, line in enumerate(lines):
+            if line.strip():
+                draw.text((margin_x, height + index * line_height), line, font=font, fill=text_color)
+        strip_array = np.asarray(strip)
+        
         def make_frame(t):
-            # 背景画像作成
-            img = Image.new("RGB", self.resolution, bg_color)
-            draw = ImageDraw.Draw(img)
+            # スクロール位置計算（下から上へ）: 帯の切り出し開始行
+            progress = min(max(t / duration, 0.0), 1.0)
+            y = int(progress * scroll_range)
+            return strip_array[y:y + height]
+        
+        return VideoClip(make_frame, duration=duration)
+
+    def _build_audio_clips(
+        self,
+        timeline: Timeline,
+        existing: Optional[Set[Path]] = None,
+    ) -> List[Any]:
+        """
+        タイムラインから音声クリップ（セリフ・BGM・効果音）を構築
+        
+        Args:
+            timeline: タイムラインオブジェクト
+            existing: 存在するファイルの集合（指定なしでここで確認）
+        
+        Returns:
+            音声クリップリスト
+        """
+        if existing is None:
+            existing = _timeline_existing_paths(timeline)
+        
+        dialogue_items = [
+            item for item in timeline.get_items_by_type(ItemType.DIALOGUE)
+            if item.audio_path in existing
+        ]
+        bgm_items = [
+            item for item in timeline.get_items_by_type(ItemType.BGM)
+            if item.audio_path in existing
+        ]
+        sfx_items = [
+            item for item in timeline.get_items_by_type(ItemType.SFX)
+            if item.audio_path in existing
+        ]
+        
+        # 読み込みはファイルごとにffmpegを起動して調べるため、スレッドで並行して開く
+        # （同じファイルでも再生位置が別々になるよう、アイテムごとに開く）
+        load_items = dialogue_items + bgm_items + sfx_items
+        loaded: Dict[int, Any] = {}  # id(アイテム) -> 音声クリップ
+        if load_items:
+            with ThreadPoolExecutor(max_workers=min(8, len(load_items))) as executor:
+                clips = executor.map(lambda item: AudioFileClip(str(item.audio_path)), load_items)
+                loaded = {id(item): clip for item, clip in zip(load_items, clips)}
+        
+        audio_clips = []
+        
+        # セリフ音声
+        for item in dialogue_items:
+            audio = loaded[id(item)].set_start(item.start_time)
+            audio_clips.append(audio)
+        
+        # BGM
+        for item in bgm_items:
+            audio = loaded[id(item)]
             
-            # スクロール位置計算（下から上へ）
-            progress = t / duration
-            start_y = self.resolution[1] - int(progress * scroll_range)
+            # 長さ調整（短い場合はループ、長い場合はカット）
+            if audio.duration < item.duration:
+                # BGMが短い場合はループ
+                from moviepy.editor import concatenate_audioclips
+                loops_needed = int(item.duration / audio.duration) + 1
+                audio = concatenate_audioclips([audio] * loops_needed)
+                audio = audio.subclip(0, item.duration)
+            elif audio.duration > item.duration:
+                audio = audio.subclip(0, item.duration)
             
-            # テキスト描画
-            for i, line in enumerate(lines):
-                y = start_y + i * line_height
-                # 画面内のテキストのみ描画
-                if -line_height < y < self.resolution[1]:
-                    draw.text((margin_x, y), line, font=font, fill=text_color)
+            # フェード適用
+            if item.fade_in > 0:
+                audio = audio.audio_fadein(item.fade_in)
+            if item.fade_out > 0:
+                audio = audio.audio_fadeout(item.fade_out)
             
-            return np.array(img)
+            audio = audio.set_start(item.start_time)
+            # BGMは音量を下げる（0.15 = 控えめ）
+            audio = audio.volumex(0.15)
+            audio_clips.append(audio)
         
-        return VideoClip(make_frame, duration=duration)
+        # 効果音
+        for item in sfx_items:
+            audio = loaded[id(item)].set_start(item.start_time)
+            audio_clips.append(audio)
+        
+        return audio_clips
 
-    def render_from_timeline(
+    def _build_compositor(
         self,
         timeline: Timeline,
-        output_path: Union[str, Path],
-        codec: str = "libx264",
-        audio_codec: str = "aac",
-        bitrate: str = "8000k",
-        preset: str = "medium",
-        threads: int = 4,
         scrolling_text: Optional[str] = None,
-    ) -> Path:
+    ) -> Optional[FrameCompositor]:
         """
-        タイムラインから動画をレンダリング
+        タイムラインからNumPyフレーム合成器を構築
+        
+        _compose_timeline と同じ順序（背景→立ち絵→字幕）で重ねる。
+        動画背景はMoviePyでのデコードが必要なため対象外。
         
         Args:
             timeline: タイムラインオブジェクト
-            output_path: 出力ファイルパス
-            codec: 動画コーデック
-            audio_codec: 音声コーデック
-            bitrate: ビットレート
-            preset: エンコードプリセット
-            threads: スレッド数
             scrolling_text: スクロールテキスト（指定時はテキストスクロール背景を使用）
         
         Returns:
-            出力ファイルパス
+            フレーム合成器（動画背景を含む場合はNone）
         """
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        total_duration = timeline.get_total_duration()
+        existing = _timeline_existing_paths(timeline)
+        
+        bg_items = timeline.get_items_by_type(ItemType.BACKGROUND)
+        if not scrolling_text:
+            for item in bg_items:
+                if item.image_path and item.image_path.suffix.lower() in [".mp4", ".mov", ".avi", ".webm"]:
+                    return None
+        
+        # 背景がない場合はデフォルト背景色、背景アイテムがあれば隙間は黒
+        compositor = FrameCompositor(
+            self.resolution,
+            base_color=(0, 0, 0) if bg_items else (30, 30, 30),
+        )
+        
+        # 背景
+        if scrolling_text:
+            scroll_clip = self.create_scrolling_text_background(
+                scrolling_text,
+                total_duration,
+            )
+            compositor.set_background_source(scroll_clip.make_frame)
+        else:
+            for item in bg_items:
+                if item.image_path in existing:
+                    compositor.add_sprite(
+                        self._get_background_array(item.image_path),
+                        (0, 0),
+                        item.start_time,
+                        item.end_time,
+                    )
         
+        # キャラクター
+        char_items = [
+            item for item in timeline.get_items_by_type(ItemType.CHARACTER)
+            if item.image_path in existing
+        ]
+        char_images = self._prepare_character_images(char_items)
+        character_arrays: Dict[int, np.ndarray] = {}  # id(画像) -> 配列
+        for item, img in zip(char_items, char_images):
+            position = item.position or (self.resolution[0] // 2, self.resolution[1] // 2)
+            
+            # 同じ立ち絵は同じ配列を渡し、合成用データを共有させる
+            array = character_arrays.get(id(img))
+            if array is None:
+                array = np.asarray(img)
+                character_arrays[id(img)] = array
+            
+            # 中心基準から左上を計算
+            compositor.add_sprite(
+                array,
+                (position[0] - img.width // 2, position[1] - img.height // 2),
+                item.start_time,
+                item.end_time,
+                fade_in=item.fade_in,
+                fade_out=item.fade_out,
+            )
+        
+        # 字幕（下部中央）
+        dialogue_items = [
+            item for item in timeline.get_items_by_type(ItemType.DIALOGUE) if item.text
+        ]
+        subtitle_images = self.subtitle_generator.create_subtitle_images(
+            [item.text for item in dialogue_items],
+            max_width=int(self.resolution[0] * 0.9),
+        )
+        for item, subtitle_img in zip(dialogue_items, subtitle_images):
+            height, width = subtitle_img.shape[:2]
+            compositor.add_sprite(
+                subtitle_img,
+                (
+                    (self.resolution[0] - width) // 2,
+                    self.resolution[1] - height - 80,
+                ),
+                item.start_time,
+                item.end_time,
+            )
+        
+        return compositor
+
+    def _compose_timeline(
+        self,
+        timeline: Timeline,
+        scrolling_text: Optional[str] = None,
+    ) -> Tuple[CompositeVideoClip, List[Any], List[Any]]:
+        """
+        タイムラインから合成クリップを構築
+        
+        Args:
+            timeline: タイムラインオブジェクト
+            scrolling_text: スクロールテキスト（指定時はテキストスクロール背景を使用）
+        
+        Returns:
+            (合成クリップ, 動画クリップリスト, 音声クリップリスト)
+        """
         total_duration = timeline.get_total_duration()
-        self.logger.info(f"動画レンダリング開始: {total_duration:.2f}秒")
+        existing = _timeline_existing_paths(timeline)
         
         video_clips = []
-        audio_clips = []
         
         # 背景クリップを作成
         if scrolling_text:
@@ -303,7 +770,7 @@ class VideoRenderer:
             bg_items = timeline.get_items_by_type(ItemType.BACKGROUND)
             if bg_items:
                 for item in bg_items:
-                    if item.image_path and item.image_path.exists():
+                    if item.image_path in existing:
                         clip = self.create_background_clip(
                             item.image_path,
                             item.duration,
@@ -319,70 +786,44 @@ class VideoRenderer:
                     )
                 )
         
-        # キャラクタークリップ
-        char_items = timeline.get_items_by_type(ItemType.CHARACTER)
-        for item in char_items:
-            if item.image_path and item.image_path.exists():
-                position = item.position or (self.resolution[0] // 2, self.resolution[1] // 2)
-                clip = self.create_character_clip(
-                    item.image_path,
-                    item.duration,
-                    position,
-                    item.scale,
-                    item.fade_in,
-                    item.fade_out,
-                    flip_horizontal=item.flip_horizontal,
-                ).set_start(item.start_time)
-                video_clips.append(clip)
-        
-        # セリフ（字幕）
-        dialogue_items = timeline.get_items_by_type(ItemType.DIALOGUE)
-        for item in dialogue_items:
-            if item.text:
-                clip = self.create_subtitle_clip(
-                    item.text,
-                    item.duration,
-                ).set_start(item.start_time)
-                video_clips.append(clip)
-            
-            # セリフ音声
-            if item.audio_path and item.audio_path.exists():
-                audio = AudioFileClip(str(item.audio_path)).set_start(item.start_time)
-                audio_clips.append(audio)
+        # キャラクタークリップ（立ち絵の読み込み・変形は並列に済ませておく）
+        char_items = [
+            item for item in timeline.get_items_by_type(ItemType.CHARACTER)
+            if item.image_path in existing
+        ]
+        char_images = self._prepare_character_images(char_items)
+        for item, variant in zip(char_items, char_images):
+            position = item.position or (self.resolution[0] // 2, self.resolution[1] // 2)
+            clip = self.create_character_clip(
+                item.image_path,
+                item.duration,
+                position,
+                item.scale,
+                item.fade_in,
+                item.fade_out,
+                flip_horizontal=item.flip_horizontal,
+                image=variant,
+            ).set_start(item.start_time)
+            video_clips.append(clip)
         
-        # BGM
-        bgm_items = timeline.get_items_by_type(ItemType.BGM)
-        for item in bgm_items:
-            if item.audio_path and item.audio_path.exists():
-                audio = AudioFileClip(str(item.audio_path))
-                
-                # 長さ調整（短い場合はループ、長い場合はカット）
-                if audio.duration < item.duration:
-                    # BGMが短い場合はループ
-                    from moviepy.editor import concatenate_audioclips
-                    loops_needed = int(item.duration / audio.duration) + 1
-                    audio = concatenate_audioclips([audio] * loops_needed)
-                    audio = audio.subclip(0, item.duration)
-                elif audio.duration > item.duration:
-                    audio = audio.subclip(0, item.duration)
-                
-                # フェード適用
-                if item.fade_in > 0:
-                    audio = audio.audio_fadein(item.fade_in)
-                if item.fade_out > 0:
-                    audio = audio.audio_fadeout(item.fade_out)
-                
-                audio = audio.set_start(item.start_time)
-                # BGMは音量を下げる（0.15 = 控えめ）
-                audio = audio.volumex(0.15)
-                audio_clips.append(audio)
+        # セリフ（字幕）- 字幕画像はまとめて並列に生成する
+        dialogue_items = [
+            item for item in timeline.get_items_by_type(ItemType.DIALOGUE) if item.text
+        ]
+        subtitle_images = self.subtitle_generator.create_subtitle_images(
+            [item.text for item in dialogue_items],
+            max_width=int(self.resolution[0] * 0.9),
+        )
+        for item, subtitle_img in zip(dialogue_items, subtitle_images):
+            clip = self.create_subtitle_clip(
+                item.text,
+                item.duration,
+                image=subtitle_img,
+            ).set_start(item.start_time)
+            video_clips.append(clip)
         
-        # 効果音
-        sfx_items = timeline.get_items_by_type(ItemType.SFX)
-        for item in sfx_items:
-            if item.audio_path and item.audio_path.exists():
-                audio = AudioFileClip(str(item.audio_path)).set_start(item.start_time)
-                audio_clips.append(audio)
+        # 音声（セリフ・BGM・効果音）
+        audio_clips = self._build_audio_clips(timeline, existing)
         
         # 動画合成
         self.logger.info(f"動画クリップ数: {len(video_clips)}, 音声クリップ数: {len(audio_clips)}")
@@ -395,8 +836,69 @@ class VideoRenderer:
         
         final_video = final_video.set_duration(total_duration)
         
+        return final_video, video_clips, audio_clips
+
+    def render_from_timeline(
+        self,
+        timeline: Timeline,
+        output_path: Union[str, Path],
+        codec: Optional[str] = "auto",
+        audio_codec: str = "aac",
+        bitrate: str = "8000k",
+        preset: Optional[str] = None,
+        performance_mode: Optional[str] = None,
+        threads: int = 4,
+        scrolling_text: Optional[str] = None,
+        use_pipe: bool = False,
+    ) -> Path:
+        """
+        タイムラインから動画をレンダリング
+        
+        Args:
+            timeline: タイムラインオブジェクト
+            output_path: 出力ファイルパス
+            codec: 動画コーデック（"auto"でNVENC/VideoToolbox/QSVを探し、なければlibx264）
+            audio_codec: 音声コーデック
+            bitrate: ビットレート
+            preset: エンコードプリセット（指定なしでコーデックに応じた既定値、x264はfaster）
+            performance_mode: 速度と画質のバランス（指定時はビットレートではなく品質固定）
+                - "fast": veryfast / CRF 26（最速、画質はやや落ちる）
+                - "balanced": faster / CRF 23（速度と画質の釣り合いが最も良い）
+                - "quality": medium / CRF 20（最も遅いが高画質）
+            threads: スレッド数
+            scrolling_text: スクロールテキスト（指定時はテキストスクロール背景を使用）
+            use_pipe: Trueで write_videofile を使わず、生フレームをFFmpegへ直接パイプ入力する
+                （render_stream と同じ。threadsは使わない）
+        
+        Returns:
+            出力ファイルパス
+        """
+        if use_pipe:
+            return self.render_stream(
+                timeline,
+                output_path,
+                codec=codec,
+                audio_codec=audio_codec,
+                bitrate=bitrate,
+                preset=preset,
+                performance_mode=performance_mode,
+                scrolling_text=scrolling_text,
+            )
+        
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        total_duration = timeline.get_total_duration()
+        self.logger.info(f"動画レンダリング開始: {total_duration:.2f}秒")
+        
+        final_video, video_clips, audio_clips = self._compose_timeline(
+            timeline,
+            scrolling_text=scrolling_text,
+        )
+        
         # 出力
-        self.logger.info(f"エンコード中: {output_path}")
+        codec, preset, ffmpeg_params = _resolve_encoder(codec, preset, performance_mode)
+        self.logger.info(f"エンコード中: {output_path} ({codec})")
         final_video.write_videofile(
             str(output_path),
             fps=self.fps,
@@ -405,6 +907,7 @@ class VideoRenderer:
             bitrate=bitrate,
             preset=preset,
             threads=threads,
+            ffmpeg_params=ffmpeg_params or None,
             logger=None,  # MoviePyのログを抑制
         )
         
@@ -415,11 +918,291 @@ class VideoRenderer:
         for clip in audio_clips:
             clip.close()
         
-        self._cleanup_temp_files()
+        self.close()
         
         self.logger.info(f"動画生成完了: {output_path}")
         return output_path
 
+    def render_stream(
+        self,
+        timeline: Timeline,
+        output_path: Union[str, Path],
+        codec: Optional[str] = "auto",
+        audio_codec: str = "aac",
+        bitrate: str = "8000k",
+        preset: Optional[str] = None,
+        performance_mode: Optional[str] = None,
+        scrolling_text: Optional[str] = None,
+        backend: str = "ffmpeg",
+    ) -> Path:
+        """
+        タイムラインから動画をレンダリング（FFmpegへ生フレームをパイプ入力）
+        
+        背景・立ち絵・字幕はNumPyで直接合成し（FrameCompositor）、
+        rawvideoとしてFFmpegの標準入力へ書き込む。動画背景を含む場合は
+        MoviePyで合成する。音声は一時WAVに書き出してから同時にmuxする。
+        backend="pyav" ではFFmpegを起動せず、PyAVでプロセス内でエンコードする。
+        
+        Args:
+            timeline: タイムラインオブジェクト
+            output_path: 出力ファイルパス
+            codec: 動画コーデック（"auto"でNVENC/VideoToolbox/QSVを探し、なければlibx264）
+            audio_codec: 音声コーデック
+            bitrate: ビットレート
+            preset: エンコードプリセット（指定なしでコーデックに応じた既定値、x264はfaster）
+            performance_mode: 速度と画質のバランス（指定時はビットレートではなく品質固定）
+                - "fast": veryfast / CRF 26（最速、画質はやや落ちる）
+                - "balanced": faster / CRF 23（速度と画質の釣り合いが最も良い）
+                - "quality": medium / CRF 20（最も遅いが高画質）
+            scrolling_text: スクロールテキスト（指定時はテキストスクロール背景を使用）
+            backend: エンコード方法（"ffmpeg": FFmpegへパイプ入力, "pyav": PyAVでエンコード）
+        
+        Returns:
+            出力ファイルパス
+        """
+        if backend not in ("ffmpeg", "pyav"):
+            raise ValueError(f"未対応のbackend: {backend}")
+        if backend == "pyav" and av is None:
+            raise ImportError("avパッケージをインストールしてください: pip install av")
+        
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        total_duration = timeline.get_total_duration()
+        self.logger.info(f"動画レンダリング開始（パイプ出力）: {total_duration:.2f}秒")
+        
+        # 映像はNumPyで直接合成（動画背景を含む場合のみMoviePyで合成）
+        compositor = self._build_compositor(
+            timeline,
+            scrolling_text=scrolling_text,
+        )
+        if compositor is not None:
+            final_video = None
+            video_clips: List[Any] = []
+            audio_clips = self._build_audio_clips(timeline)
+            make_frame = compositor.render
+            final_audio = None
+            if audio_clips:
+                final_audio = CompositeAudioClip(audio_clips).set_duration(total_duration)
+        else:
+            final_video, video_clips, audio_clips = self._compose_timeline(
+                timeline,
+                scrolling_text=scrolling_text,
+            )
+            make_frame = final_video.get_frame
+            final_audio = final_video.audio
+        
+        codec, preset, ffmpeg_params = _resolve_encoder(codec, preset, performance_mode)
+        frame_count = int(total_duration * self.fps)
+        
+        self.logger.info(f"エンコード中: {output_path} ({codec}, {backend})")
+        try:
+            if backend == "pyav":
+                self._encode_pyav(
+                    make_frame, frame_count, final_audio, output_path,
+                    codec, audio_codec, bitrate, preset, ffmpeg_params,
+                )
+            else:
+                self._encode_ffmpeg_pipe(
+                    make_frame, frame_count, final_audio, output_path,
+                    codec, audio_codec, bitrate, preset, ffmpeg_params,
+                )
+        finally:
+            # クリーンアップ
+            if final_video is not None:
+                final_video.close()
+            for clip in video_clips:
+                clip.close()
+            for clip in audio_clips:
+                clip.close()
+            self.close()
+        
+        self.logger.info(f"動画生成完了: {output_path}")
+        return output_path
+
+    def _encode_ffmpeg_pipe(
+        self,
+        make_frame: Callable[[float], np.ndarray],
+        frame_count: int,
+        final_audio: Optional[Any],
+        output_path: Path,
+        codec: str,
+        audio_codec: str,
+        bitrate: str,
+        preset: str,
+        ffmpeg_params: List[str],
+    ) -> None:
+        """生フレームをFFmpegの標準入力へ書き込んでエンコード"""
+        from moviepy.config import get_setting
+        
+        width, height = self.resolution
+        cmd = [
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}", "-r", str(self.fps),
+            "-i", "-",
+        ]
+        
+        # 音声は一時WAVに書き出して2番目の入力にする
+        if final_audio is not None:
+            fd, audio_name = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            audio_path = Path(audio_name)
+            self._temp_files.append(audio_path)
+            final_audio.write_audiofile(str(audio_path), fps=44100, logger=None)
+            cmd += ["-i", str(audio_path), "-c:a", audio_codec, "-shortest"]
+        
+        cmd += [
+            "-c:v", codec, "-preset", preset, "-b:v", bitrate,
+            *ffmpeg_params,
+            "-pix_fmt", "yuv420p",
+            str(output_path),
+        ]
+        
+        # stderrはパイプではなく一時ファイルへ流す（読まれないパイプが詰まるとFFmpegが止まるため）
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_file)
+            pipe_broken = False
+            try:
+                for i in range(frame_count):
+                    frame = make_frame(i / self.fps)
+                    try:
+                        process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8))
+                    except OSError:
+                        # FFmpegが先に終了した（BrokenPipeErrorを含む）
+                        pipe_broken = True
+                        break
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pipe_broken = True
+                process.wait()
+            
+            if process.returncode != 0 or pipe_broken:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode(errors="replace")
+                raise RuntimeError(
+                    f"FFmpegエンコード失敗 (終了コード {process.returncode}): {stderr}"
+                )
+
+    def _encode_pyav(
+        self,
+        make_frame: Callable[[float], np.ndarray],
+        frame_count: int,
+        final_audio: Optional[Any],
+        output_path: Path,
+        codec: str,
+        audio_codec: str,
+        bitrate: str,
+        preset: str,
+        ffmpeg_params: List[str],
+    ) -> None:
+        """PyAVでプロセス内エンコード（サブプロセス・パイプを使わない）"""
+        width, height = self.resolution
+        
+        # FFmpegの "-名前 値" 形式の追加引数をエンコーダーオプションに変換
+        options = {"preset": preset}
+        options.update(zip(
+            (name.lstrip("-") for name in ffmpeg_params[0::2]),
+            ffmpeg_params[1::2],
+        ))
+        
+        sample_rate = 44100
+        container = av.open(str(output_path), mode="w")
+        try:
+            # ストリームは最初のmuxより前にすべて追加しておく
+            video_stream = container.add_stream(codec, rate=self.fps)
+            video_stream.width = width
+            video_stream.height = height
+            video_stream.pix_fmt = "yuv420p"
+            video_stream.bit_rate = _parse_bitrate(bitrate)
+            video_stream.options = options
+            
+            audio_stream = None
+            audio_chunks = iter(())
+            layout = "stereo"
+            if final_audio is not None:
+                layout = "stereo" if final_audio.nchannels == 2 else "mono"
+                audio_stream = container.add_stream(audio_codec, rate=sample_rate)
+                audio_stream.layout = layout
+                # 1秒ずつ取り出し、映像1秒分ごとに交互にエンコードする
+                audio_chunks = final_audio.iter_chunks(
+                    chunksize=sample_rate,
+                    fps=sample_rate,
+                    quantize=False,
+                )
+            samples_written = 0
+            
+            def encode_audio_chunk(chunk: np.ndarray) -> None:
+                nonlocal samples_written
+                # (サンプル数, チャンネル数) -> (チャンネル数, サンプル数) のプレーナー形式
+                planar = np.ascontiguousarray(chunk.T, dtype=np.float32)
+                audio_frame = av.AudioFrame.from_ndarray(planar, format="fltp", layout=layout)
+                audio_frame.sample_rate = sample_rate
+                audio_frame.pts = samples_written
+                samples_written += planar.shape[1]
+                for packet in audio_stream.encode(audio_frame):
+                    container.mux(packet)
+            
+            for i in range(frame_count):
+                if audio_stream is not None and i % self.fps == 0:
+                    chunk = next(audio_chunks, None)
+                    if chunk is not None:
+                        encode_audio_chunk(chunk)
+                
+                frame = av.VideoFrame.from_ndarray(
+                    np.ascontiguousarray(make_frame(i / self.fps), dtype=np.uint8),
+                    format="rgb24",
+                )
+                for packet in video_stream.encode(frame):
+                    container.mux(packet)
+            for packet in video_stream.encode():
+                container.mux(packet)
+            
+            if audio_stream is not None:
+                for chunk in audio_chunks:
+                    encode_audio_chunk(chunk)
+                for packet in audio_stream.encode():
+                    container.mux(packet)
+        finally:
+            container.close()
+
+    def _get_preview_image(
+        self,
+        path: Path,
+        size: Optional[Tuple[int, int]] = None,
+        scale: float = 1.0,
+    ) -> np.ndarray:
+        """
+        プレビュー用に変形済みのRGBA配列を取得（同じ画像・サイズは再利用）
+        
+        Args:
+            path: 画像パス
+            size: リサイズ後のサイズ（指定時はscaleより優先）
+            scale: スケール
+        
+        Returns:
+            RGBA配列 (HxWx4, uint8)
+        """
+        path = Path(path)
+        key = (str(path), path.stat().st_mtime_ns, size or scale)
+        cached = self._preview_images.get(key)
+        if cached is not None:
+            return cached
+        
+        # プレビューは速度優先のため、書き出し（LANCZOS）より軽いBILINEARで縮小する
+        img = _load_rgba(path)
+        if size is not None:
+            img = img.resize(size, Image.Resampling.BILINEAR)
+        elif scale != 1.0:
+            new_size = (int(img.width * scale), int(img.height * scale))
+            img = img.resize(new_size, Image.Resampling.BILINEAR)
+        
+        array = np.asarray(img)
+        self._preview_images[key] = array
+        return array
+
     def render_preview(
         self,
         timeline: Timeline,
@@ -440,50 +1223,54 @@ class VideoRenderer:
         # 指定時間のアイテムを取得
         items = timeline.get_items_at(time)
         
-        # 空の画像を作成
-        result = Image.new("RGBA", self.resolution, (30, 30, 30, 255))
+        # 使い回しのNumPyバッファに合成する
+        compositor = self._preview_compositor
+        if compositor is None:
+            compositor = FrameCompositor(self.resolution, base_color=(30, 30, 30))
+            self._preview_compositor = compositor
+        else:
+            compositor.clear()
         
         # レイヤー順にソート
         items.sort(key=lambda x: x.layer)
         
         for item in items:
             if item.type == ItemType.BACKGROUND and item.image_path:
-                bg = Image.open(item.image_path).convert("RGBA")
-                bg = bg.resize(self.resolution)
-                result = Image.alpha_composite(result, bg)
+                bg = self._get_preview_image(item.image_path, size=self.resolution)
+                compositor.add_sprite(bg, (0, 0), item.start_time, item.end_time)
             
             elif item.type == ItemType.CHARACTER and item.image_path:
-                char = Image.open(item.image_path).convert("RGBA")
-                if item.scale != 1.0:
-                    new_size = (
-                        int(char.width * item.scale),
-                        int(char.height * item.scale),
-                    )
-                    char = char.resize(new_size)
+                char = self._get_preview_image(item.image_path, scale=item.scale)
                 
                 position = item.position or (self.resolution[0] // 2, self.resolution[1] // 2)
                 # 中心位置から左上座標を計算
                 paste_pos = (
-                    position[0] - char.width // 2,
-                    position[1] - char.height // 2,
+                    position[0] - char.shape[1] // 2,
+                    position[1] - char.shape[0] // 2,
                 )
-                result.paste(char, paste_pos, char)
+                compositor.add_sprite(char, paste_pos, item.start_time, item.end_time)
             
             elif item.type == ItemType.DIALOGUE and item.text:
-                subtitle = self.subtitle_generator.create_subtitle_image(
+                subtitle = np.asarray(self.subtitle_generator.create_subtitle_image(
                     item.text,
                     max_width=int(self.resolution[0] * 0.9),
-                )
+                ))
                 # 下部中央に配置
                 paste_pos = (
-                    (self.resolution[0] - subtitle.width) // 2,
-                    self.resolution[1] - subtitle.height - 80,
+                    (self.resolution[0] - subtitle.shape[1]) // 2,
+                    self.resolution[1] - subtitle.shape[0] - 80,
                 )
-                result.paste(subtitle, paste_pos, subtitle)
+                compositor.add_sprite(subtitle, paste_pos, item.start_time, item.end_time)
+        
+        # 合成はNumPy上で行い、最後に1回だけPIL画像へ変換
+        result = Image.fromarray(compositor.render(time)).convert("RGBA")
         
         if output_path:
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            result.save(output_path)
+            image_format = Image.registered_extensions().get(output_path.suffix.lower(), "PNG")
+            # 大きめのバッファで書き込み、PNGは低圧縮で高速に保存
+            with open(output_path, "wb", buffering=1024 * 1024) as f:
+                result.save(f, format=image_format, compress_level=1)
         
         return result
@@ -4,16 +4,49 @@
 Pillowを使用して字幕画像を生成する
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import io
+import math
+import os
 
 from PIL import Image, ImageDraw, ImageFont
+import numpy as np
 
 from ..utils.config import Config
+from ..utils.fonts import get_font
 from ..utils.logger import get_logger
 
 
+# これより少ない字幕はプロセス起動のコストの方が大きいため逐次生成する
+_PARALLEL_MIN_TEXTS = 16
+
+# 生成済み字幕画像のキャッシュ上限
+_IMAGE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=256)
+def _hex_to_rgba(hex_color: str, alpha: int = 255) -> Tuple[int, int, int, int]:
+    """16進数カラーをRGBAに変換（使う色は少ないので結果をキャッシュ）"""
+    hex_color = hex_color.lstrip("#")
+    if len(hex_color) == 6:
+        r = int(hex_color[0:2], 16)
+        g = int(hex_color[2:4], 16)
+        b = int(hex_color[4:6], 16)
+        return (r, g, b, alpha)
+    elif len(hex_color) == 8:
+        r = int(hex_color[0:2], 16)
+        g = int(hex_color[2:4], 16)
+        b = int(hex_color[4:6], 16)
+        a = int(hex_color[6:8], 16)
+        return (r, g, b, a)
+    else:
+        return (255, 255, 255, alpha)
+
+
 class SubtitleGenerator:
     """字幕生成クラス"""
 
@@ -45,49 +78,65 @@ class SubtitleGenerator:
         
         # フォントの読み込み
         self._font: Optional[ImageFont.FreeTypeFont] = None
+        
+        # 計測用の描画コンテキスト（毎回ダミー画像を作らない）
+        self._dummy_draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        
+        # (フォントパス, フォントサイズ, 文字) -> 文字幅
+        self._char_widths: Dict[Tuple[str, int, str], float] = {}
+        
+        # 描画設定・テキスト -> 字幕画像
+        self._image_cache: Dict[tuple, Image.Image] = {}
 
     @property
     def font(self) -> ImageFont.FreeTypeFont:
         """フォントを取得（遅延読み込み）"""
         if self._font is None:
-            try:
-                self._font = ImageFont.truetype(self.font_path, self.font_size)
-            except Exception as e:
-                self.logger.warning(f"フォント読み込み失敗: {e}, デフォルトフォント使用")
-                # システムフォントを試す
-                try:
-                    self._font = ImageFont.truetype("/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc", self.font_size)
-                except:
-                    self._font = ImageFont.load_default()
+            self._font = self._load_font(self.font_size)
         return self._font
 
+    def _load_font(self, size: int) -> ImageFont.FreeTypeFont:
+        """指定サイズのフォントを読み込む（失敗時はシステムフォント・デフォルトフォント）"""
+        try:
+            return get_font(self.font_path, size)
+        except Exception as e:
+            self.logger.warning(f"フォント読み込み失敗: {e}, デフォルトフォント使用")
+            # システムフォントを試す
+            try:
+                return get_font("/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc", size)
+            except:
+                return ImageFont.load_default()
+
+    def _font_for_size(self, size: int) -> ImageFont.FreeTypeFont:
+        """指定サイズのフォント（通常サイズなら読み込み済みのものを使う）"""
+        if size == self.font_size:
+            return self.font
+        return self._load_font(size)
+
     def _hex_to_rgba(self, hex_color: str, alpha: int = 255) -> Tuple[int, int, int, int]:
         """16進数カラーをRGBAに変換"""
-        hex_color = hex_color.lstrip("#")
-        if len(hex_color) == 6:
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            return (r, g, b, alpha)
-        elif len(hex_color) == 8:
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            a = int(hex_color[6:8], 16)
-            return (r, g, b, a)
-        else:
-            return (255, 255, 255, alpha)
-
-    def get_text_size(self, text: str) -> Tuple[int, int]:
-        """テキストのサイズを取得"""
-        # ダミー画像を作成してテキストサイズを計測
-        dummy = Image.new("RGBA", (1, 1))
-        draw = ImageDraw.Draw(dummy)
-        bbox = draw.textbbox((0, 0), text, font=self.font)
+        return _hex_to_rgba(hex_color, alpha)
+
+    def get_text_size(
+        self,
+        text: str,
+        font: Optional[ImageFont.FreeTypeFont] = None,
+    ) -> Tuple[int, int]:
+        """テキストのサイズを取得（fontを指定しなければ通常のフォント）"""
+        bbox = self._dummy_draw.textbbox((0, 0), text, font=font or self.font)
         width = bbox[2] - bbox[0]
         height = bbox[3] - bbox[1]
         return (width + self.stroke_width * 2, height + self.stroke_width * 2)
 
+    def _text_width(
+        self,
+        text: str,
+        font: Optional[ImageFont.FreeTypeFont] = None,
+    ) -> int:
+        """テキストの幅のみを取得（textbboxより軽いtextlengthで計測）"""
+        width = self._dummy_draw.textlength(text, font=font or self.font)
+        return int(math.ceil(width)) + self.stroke_width * 2
+
     def create_subtitle_image(
         self,
         text: str,
@@ -95,6 +144,8 @@ class SubtitleGenerator:
         background_color: Optional[str] = None,
         background_opacity: int = 0,
         padding: int = 10,
+        font_size: Optional[int] = None,
+        color: Optional[str] = None,
     ) -> Image.Image:
         """
         字幕画像を生成
@@ -105,25 +156,60 @@ class SubtitleGenerator:
             background_color: 背景色（16進数）
             background_opacity: 背景不透明度（0-255）
             padding: パディング
+            font_size: フォントサイズ（指定なしで通常のサイズ）
+            color: 文字色（16進数、指定なしで通常の色）
         
         Returns:
             字幕画像（RGBA）
         """
+        font_size = font_size or self.font_size
+        color = color or self.color
+        
+        # 同じテキスト・同じ設定の字幕は描画済みの画像を複製して返す
+        key = (
+            text, max_width, background_color, background_opacity, padding,
+            self.font_path, font_size, color, self.stroke_color, self.stroke_width,
+        )
+        cached = self._image_cache.get(key)
+        if cached is not None:
+            return cached.copy()
+        
+        img = self._render_subtitle_image(
+            text, max_width, background_color, background_opacity, padding,
+            font_size, color,
+        )
+        
+        if len(self._image_cache) >= _IMAGE_CACHE_SIZE:
+            # 最も古いものを捨てる
+            del self._image_cache[next(iter(self._image_cache))]
+        self._image_cache[key] = img
+        return img.copy()
+
+    def _render_subtitle_image(
+        self,
+        text: str,
+        max_width: Optional[int],
+        background_color: Optional[str],
+        background_opacity: int,
+        padding: int,
+        font_size: int,
+        color: str,
+    ) -> Image.Image:
+        """字幕画像を描画（キャッシュなし）"""
+        font = self._font_for_size(font_size)
+        
         # テキストを折り返し
         if max_width:
-            text = self._wrap_text(text, max_width - padding * 2)
+            text = self._wrap_text(text, max_width - padding * 2, font, font_size)
         
         # サイズ計算
-        text_width, text_height = self.get_text_size(text)
+        text_width, text_height = self.get_text_size(text, font)
         
         # 複数行の場合はサイズを再計算
         lines = text.split("\n")
         if len(lines) > 1:
-            max_line_width = 0
-            for line in lines:
-                line_width, _ = self.get_text_size(line)
-                max_line_width = max(max_line_width, line_width)
-            text_width = max_line_width
+            # 各行は幅だけ分かればよい
+            text_width = max(self._text_width(line, font) for line in lines)
             text_height = (text_height + 5) * len(lines)
         
         img_width = text_width + padding * 2
@@ -142,14 +228,14 @@ class SubtitleGenerator:
         x = padding
         y = padding
         
-        text_color = self._hex_to_rgba(self.color)
+        text_color = self._hex_to_rgba(color)
         stroke_color = self._hex_to_rgba(self.stroke_color)
         
         # テキスト描画（縁取り付き）
         draw.text(
             (x, y),
             text,
-            font=self.font,
+            font=font,
             fill=text_color,
             stroke_width=self.stroke_width,
             stroke_fill=stroke_color,
@@ -157,30 +243,129 @@ class SubtitleGenerator:
         
         return img
 
-    def _wrap_text(self, text: str, max_width: int) -> str:
-        """テキストを折り返す"""
+    def create_subtitle_images(
+        self,
+        texts: Sequence[str],
+        max_width: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> List[np.ndarray]:
+        """
+        複数の字幕画像をまとめて生成（件数が多ければプロセスを分けて並列化）
+        
+        Args:
+            texts: 字幕テキストのリスト
+            max_width: 最大幅（折り返し用）
+            max_workers: ワーカープロセス数（指定なしでCPUコア数）
+        
+        Returns:
+            字幕画像（RGBA配列）のリスト（textsと同じ順、同じテキストは同じ配列を共有）
+        """
+        # 同じテキストは1回だけ描画する
+        unique_texts = list(dict.fromkeys(texts))
+        images = dict(zip(
+            unique_texts,
+            self._rasterize_texts(unique_texts, max_width, max_workers),
+        ))
+        return [images[text] for text in texts]
+
+    def _rasterize_texts(
+        self,
+        texts: List[str],
+        max_width: Optional[int],
+        max_workers: Optional[int],
+    ) -> List[np.ndarray]:
+        """字幕画像を生成（件数が多ければプロセスプールで並列化）"""
+        if len(texts) >= _PARALLEL_MIN_TEXTS:
+            workers = max_workers or os.cpu_count() or 1
+            settings = (
+                self.font_path,
+                self.font_size,
+                self.color,
+                self.stroke_color,
+                self.stroke_width,
+            )
+            jobs = [(settings, text, max_width) for text in texts]
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(
+                        _rasterize_subtitle,
+                        jobs,
+                        chunksize=max(1, len(jobs) // (workers * 4)),
+                    ))
+            except (OSError, BrokenProcessPool) as e:
+                self.logger.warning(f"字幕の並列生成に失敗: {e}, 逐次生成します")
+        
+        return [
+            np.asarray(self.create_subtitle_image(text, max_width=max_width))
+            for text in texts
+        ]
+
+    def _char_width(
+        self,
+        char: str,
+        font: ImageFont.FreeTypeFont,
+        font_size: int,
+    ) -> float:
+        """1文字の幅（送り幅）を取得（フォント・サイズごとにキャッシュ）"""
+        key = (self.font_path, font_size, char)
+        width = self._char_widths.get(key)
+        if width is None:
+            width = self._dummy_draw.textlength(char, font=font)
+            self._char_widths[key] = width
+        return width
+
+    def _wrap_text(
+        self,
+        text: str,
+        max_width: int,
+        font: Optional[ImageFont.FreeTypeFont] = None,
+        font_size: Optional[int] = None,
+    ) -> str:
+        """テキストを折り返す（fontを指定しなければ通常のフォント）"""
         if not max_width:
             return text
         
-        words = list(text)  # 日本語は文字単位
-        lines = []
-        current_line = ""
+        if font is None or font_size is None:
+            font, font_size = self.font, self.font_size
+        
+        # 明示的な改行はそのまま残し、段落ごとに折り返す
+        limit = max_width - self.stroke_width * 2
+        return "\n".join(
+            line
+            for paragraph in text.split("\n")
+            for line in self._wrap_paragraph(paragraph, limit, font, font_size)
+        )
+
+    def _wrap_paragraph(
+        self,
+        text: str,
+        limit: float,
+        font: ImageFont.FreeTypeFont,
+        font_size: int,
+    ) -> List[str]:
+        """改行を含まないテキストを折り返し、行のリストを返す"""
+        if not text:
+            return [""]
         
-        for char in words:
-            test_line = current_line + char
-            test_width, _ = self.get_text_size(test_line)
-            
-            if test_width <= max_width:
-                current_line = test_line
-            else:
-                if current_line:
-                    lines.append(current_line)
-                current_line = char
+        # 文字幅の累積和から、各行に収まる最後の文字を二分探索で求める（日本語は文字単位）
+        widths = np.fromiter(
+            (self._char_width(char, font, font_size) for char in text),
+            dtype=np.float64,
+            count=len(text),
+        )
+        cumulative = np.cumsum(widths)
         
-        if current_line:
-            lines.append(current_line)
+        lines = []
+        start = 0
+        while start < len(text):
+            base = cumulative[start - 1] if start else 0.0
+            end = int(np.searchsorted(cumulative, base + limit, side="right"))
+            # 1文字も収まらない場合でも1文字は置く
+            end = max(end, start + 1)
+            lines.append(text[start:end])
+            start = end
         
-        return "\n".join(lines)
+        return lines
 
     def save_subtitle(
         self,
@@ -194,7 +379,9 @@ class SubtitleGenerator:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         img = self.create_subtitle_image(text, max_width=max_width, **kwargs)
-        img.save(output_path, "PNG")
+        # 大きめのバッファで書き込み、ほぼ透明な字幕画像は低圧縮で十分
+        with open(output_path, "wb", buffering=1024 * 1024) as f:
+            img.save(f, "PNG", compress_level=1)
         
         self.logger.debug(f"字幕保存: {output_path}")
         return output_path
@@ -220,30 +407,27 @@ class SubtitleGenerator:
         Returns:
             名前タグ画像
         """
-        # 一時的にフォントサイズを変更
-        original_font = self._font
-        original_size = self.font_size
-        
-        if font_size:
-            self.font_size = font_size
-        else:
-            self.font_size = int(self.font_size * 0.8)
-        self._font = None  # 再読み込みを強制
-        
-        original_color = self.color
-        self.color = color
-        
-        # 名前タグ生成
-        img = self.create_subtitle_image(
+        # フォントサイズ・色は引数で渡し、インスタンスの設定は書き換えない
+        # （同じ名前タグは create_subtitle_image のキャッシュから返る）
+        return self.create_subtitle_image(
             name,
             background_color=background_color,
             background_opacity=background_opacity,
             padding=8,
+            font_size=font_size or int(self.font_size * 0.8),
+            color=color,
         )
-        
-        # 設定を復元
-        self.font_size = original_size
-        self._font = original_font
-        self.color = original_color
-        
-        return img
+
+
+# ワーカープロセスごとの字幕生成器（フォント読み込みを1回で済ませる）
+_worker_generators: Dict[tuple, SubtitleGenerator] = {}
+
+
+def _rasterize_subtitle(job: Tuple[tuple, str, Optional[int]]) -> np.ndarray:
+    """ワーカープロセスで字幕画像を生成（(設定, テキスト, 最大幅) -> RGBA配列）"""
+    settings, text, max_width = job
+    generator = _worker_generators.get(settings)
+    if generator is None:
+        generator = SubtitleGenerator(*settings)
+        _worker_generators[settings] = generator
+    return np.asarray(generator.create_subtitle_image(text, max_width=max_width))
@@ -4,13 +4,21 @@
 動画のセリフ・音声・立ち絵の時間軸管理を行う
 """
 
-from dataclasses import dataclass, field
+from collections import defaultdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import bisect
 import json
+import math
 
-from pydantic import BaseModel
+import numpy as np
+
+try:
+    import orjson  # オプション: 高速なJSON書き出し
+except ImportError:
+    orjson = None
 
 
 class ItemType(str, Enum):
@@ -23,8 +31,13 @@ class ItemType(str, Enum):
     TRANSITION = "transition"  # トランジション
 
 
-class TimelineItem(BaseModel):
-    """タイムラインアイテム"""
+@dataclass(slots=True)
+class TimelineItem:
+    """
+    タイムラインアイテム
+    
+    件数が多くなるため、検証を行うpydanticモデルではなくslots付きのdataclassにしている
+    """
     id: str
     type: ItemType
     start_time: float  # 開始時間（秒）
@@ -63,8 +76,12 @@ class TimelineItem(BaseModel):
             other.start_time < self.end_time
         )
 
-    class Config:
-        arbitrary_types_allowed = True
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換（パスは文字列にする）"""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data["audio_path"] = str(self.audio_path) if self.audio_path else None
+        data["image_path"] = str(self.image_path) if self.image_path else None
+        return data
 
 
 class Timeline:
@@ -73,17 +90,115 @@ class Timeline:
     def __init__(self):
         self.items: List[TimelineItem] = []
         self._id_counter = 0
+        
+        # ソート済みの並び（未作成ならNone）。追加時は挿入で維持し、削除時は作り直す
+        self._sorted_by_time: Optional[List[TimelineItem]] = None
+        self._sorted_by_layer: Optional[List[TimelineItem]] = None
+        # itemsが開始時間順に追加されているか（その場合は時間順のソートを省く）
+        self._time_ordered = True
+        
+        # 時間検索用の索引 (開始時間順の添字, 開始時間, 終了時間, 終了時間の累積最大)
+        self._time_index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        
+        # 種類別・キャラクター別のアイテム（追加順）
+        self._by_type: Optional[Dict[ItemType, List[TimelineItem]]] = None
+        self._by_character: Optional[Dict[str, List[TimelineItem]]] = None
+
+    def _invalidate_index(self) -> None:
+        """時間索引を破棄（次回の使用時に作り直す）"""
+        self._time_index = None
+
+    def _invalidate_sorted(self) -> None:
+        """ソート済みの並びと索引を破棄（次回の使用時に作り直す）"""
+        self._sorted_by_time = None
+        self._sorted_by_layer = None
+        self._by_type = None
+        self._by_character = None
+        self._invalidate_index()
+
+    def _build_buckets(self) -> None:
+        """種類別・キャラクター別のアイテム一覧を作る"""
+        by_type: Dict[ItemType, List[TimelineItem]] = defaultdict(list)
+        by_character: Dict[str, List[TimelineItem]] = defaultdict(list)
+        for item in self.items:
+            by_type[item.type].append(item)
+            if item.character:
+                by_character[item.character].append(item)
+        self._by_type = by_type
+        self._by_character = by_character
+
+    def _add_to_buckets(self, item: TimelineItem) -> None:
+        """作成済みの種類別・キャラクター別一覧にアイテムを追加"""
+        if self._by_type is None or self._by_character is None:
+            return
+        self._by_type[item.type].append(item)
+        if item.character:
+            self._by_character[item.character].append(item)
+
+    def _get_time_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        時間検索用の索引を取得
+        
+        開始時間順に並べ、終了時間の累積最大を持っておくと、
+        ある時刻より後に終わるアイテムは累積最大がその時刻を超えた位置以降に限られる
+        
+        Returns:
+            (itemsの添字, 開始時間, 終了時間, 終了時間の累積最大)。いずれも開始時間順
+        """
+        if self._time_index is None:
+            count = len(self.items)
+            starts = np.fromiter((item.start_time for item in self.items), dtype=np.float64, count=count)
+            ends = np.fromiter((item.end_time for item in self.items), dtype=np.float64, count=count)
+            order = np.argsort(starts, kind="stable")
+            starts, ends = starts[order], ends[order]
+            self._time_index = (order, starts, ends, np.maximum.accumulate(ends))
+        return self._time_index
+
+    def _query_time_index(self, start: float, end: float, inclusive_start: bool) -> List[TimelineItem]:
+        """開始時間が end 未満（inclusive_startなら以下）で、start より後に終わるアイテムを追加順に返す"""
+        order, starts, ends, max_ends = self._get_time_index()
+        hi = int(np.searchsorted(starts, end, side="right" if inclusive_start else "left"))
+        lo = int(np.searchsorted(max_ends, start, side="right"))
+        if lo >= hi:
+            return []
+        
+        indices = np.sort(order[lo:hi][ends[lo:hi] > start])
+        items = self.items
+        return [items[i] for i in indices]
+
+    def _track_time_order(self, new_items: Sequence[TimelineItem]) -> None:
+        """追加するアイテムで開始時間順が崩れるか確認（itemsに追加する前に呼ぶ）"""
+        if not self._time_ordered:
+            return
+        last = self.items[-1].start_time if self.items else -math.inf
+        for item in new_items:
+            if item.start_time < last:
+                self._time_ordered = False
+                return
+            last = item.start_time
+
+    def _insert_sorted(self, item: TimelineItem) -> None:
+        """ソート済みの並びにアイテムを挿入（同じキーでは追加順を保つ）"""
+        if self._sorted_by_time is not None:
+            bisect.insort_right(self._sorted_by_time, item, key=lambda x: x.start_time)
+        if self._sorted_by_layer is not None:
+            bisect.insort_right(self._sorted_by_layer, item, key=lambda x: x.layer)
 
     def _generate_id(self, prefix: str = "item") -> str:
         """ユニークIDを生成"""
         self._id_counter += 1
-        return f"{prefix}_{self._id_counter:04d}"
+        # 書式指定の解釈を避け、文字列操作だけで "prefix_0001" 形式にする
+        return prefix + "_" + str(self._id_counter).zfill(4)
 
     def add_item(self, item: TimelineItem) -> TimelineItem:
         """アイテムを追加"""
         if not item.id:
             item.id = self._generate_id(item.type.value)
+        self._track_time_order((item,))
         self.items.append(item)
+        self._insert_sorted(item)
+        self._add_to_buckets(item)
+        self._invalidate_index()
         return item
 
     def add_dialogue(
@@ -111,6 +226,47 @@ class Timeline:
         )
         return self.add_item(item)
 
+    def extend_dialogues(
+        self,
+        texts: Sequence[str],
+        characters: Sequence[str],
+        start_times: Sequence[float],
+        durations: Sequence[float],
+        audio_paths: Sequence[Optional[Path]],
+        expressions: Sequence[str],
+    ) -> List[TimelineItem]:
+        """
+        セリフをまとめて追加
+        
+        各引数は同じ長さの列で、i番目の要素が1つのセリフに対応する
+        
+        Returns:
+            追加したアイテムのリスト
+        """
+        start_times = np.asarray(start_times, dtype=np.float64).tolist()
+        durations = np.asarray(durations, dtype=np.float64).tolist()
+        
+        items = [
+            TimelineItem(
+                id=self._generate_id("dialogue"),
+                type=ItemType.DIALOGUE,
+                start_time=start,
+                duration=duration,
+                text=text,
+                character=character,
+                expression=expression,
+                audio_path=audio_path,
+                layer=10,  # セリフは前面
+            )
+            for text, character, start, duration, audio_path, expression in zip(
+                texts, characters, start_times, durations, audio_paths, expressions
+            )
+        ]
+        self._track_time_order(items)
+        self.items.extend(items)
+        self._invalidate_sorted()
+        return items
+
     def add_background(
         self,
         image_path: Path,
@@ -155,6 +311,63 @@ class Timeline:
         )
         return self.add_item(item)
 
+    def extend_characters(
+        self,
+        character: str,
+        expressions: Sequence[str],
+        start_times: Sequence[float],
+        durations: Sequence[float],
+        scales: Sequence[float],
+        image_paths: Sequence[Optional[Path]],
+        position: Optional[tuple[int, int]] = None,
+        flip_horizontal: bool = False,
+    ) -> List[TimelineItem]:
+        """
+        1キャラクター分の立ち絵をまとめて追加
+        
+        expressions, start_times, durations, scales, image_paths は
+        同じ長さの列で、i番目の要素が1つの立ち絵に対応する
+        
+        Args:
+            character: キャラクター名
+            expressions: 表情の列
+            start_times: 開始時間の列
+            durations: 持続時間の列
+            scales: スケールの列
+            image_paths: 画像パスの列
+            position: 表示位置（全アイテム共通）
+            flip_horizontal: 左右反転（全アイテム共通）
+        
+        Returns:
+            追加したアイテムのリスト
+        """
+        start_times = np.asarray(start_times, dtype=np.float64).tolist()
+        durations = np.asarray(durations, dtype=np.float64).tolist()
+        scales = np.asarray(scales, dtype=np.float64).tolist()
+        
+        items = [
+            TimelineItem(
+                id=self._generate_id("char"),
+                type=ItemType.CHARACTER,
+                start_time=start,
+                duration=duration,
+                character=character,
+                expression=expression,
+                image_path=image_path,
+                position=position,
+                scale=scale,
+                flip_horizontal=flip_horizontal,
+                layer=5,  # キャラクターは中間
+            )
+            for expression, start, duration, scale, image_path in zip(
+                expressions, start_times, durations, scales, image_paths
+            )
+        ]
+        self._track_time_order(items)
+        self.items.extend(items)
+        self._invalidate_sorted()
+        return items
+
     def add_bgm(
         self,
         audio_path: Path,
@@ -198,50 +411,58 @@ class Timeline:
         return self.add_item(item)
 
     def get_items_at(self, time: float) -> List[TimelineItem]:
-        """指定時間のアイテムを取得"""
-        return [
-            item for item in self.items
-            if item.start_time <= time < item.end_time
-        ]
+        """指定時間のアイテムを取得（追加順）"""
+        return self._query_time_index(time, time, inclusive_start=True)
 
     def get_items_by_type(self, item_type: ItemType) -> List[TimelineItem]:
         """種類でアイテムを取得"""
-        return [item for item in self.items if item.type == item_type]
+        if self._by_type is None:
+            self._build_buckets()
+        return list(self._by_type.get(item_type, ()))
 
     def get_items_by_character(self, character: str) -> List[TimelineItem]:
         """キャラクターでアイテムを取得"""
-        return [item for item in self.items if item.character == character]
+        if self._by_character is None:
+            self._build_buckets()
+        return list(self._by_character.get(character, ()))
 
     def get_total_duration(self) -> float:
         """タイムライン全体の長さ（秒）"""
         if not self.items:
             return 0.0
-        return max(item.end_time for item in self.items)
+        # 終了時間の累積最大の末尾が全体の最大
+        return float(self._get_time_index()[3][-1])
 
     def get_items_in_range(
         self,
         start: float,
         end: float,
     ) -> List[TimelineItem]:
-        """時間範囲内のアイテムを取得"""
-        return [
-            item for item in self.items
-            if item.start_time < end and item.end_time > start
-        ]
+        """時間範囲内のアイテムを取得（追加順）"""
+        return self._query_time_index(start, end, inclusive_start=False)
 
     def sort_by_layer(self) -> List[TimelineItem]:
-        """レイヤー順にソート"""
-        return sorted(self.items, key=lambda x: x.layer)
+        """レイヤー順にソート（返すリストは共有されるため書き換えないこと）"""
+        if self._sorted_by_layer is None:
+            self._sorted_by_layer = sorted(self.items, key=lambda x: x.layer)
+        return self._sorted_by_layer
 
     def sort_by_time(self) -> List[TimelineItem]:
-        """時間順にソート"""
-        return sorted(self.items, key=lambda x: x.start_time)
+        """時間順にソート（返すリストは共有されるため書き換えないこと）"""
+        if self._sorted_by_time is None:
+            if self._time_ordered:
+                # 開始時間順に追加されていればソート不要
+                self._sorted_by_time = list(self.items)
+            else:
+                self._sorted_by_time = sorted(self.items, key=lambda x: x.start_time)
+        return self._sorted_by_time
 
     def remove_item(self, item_id: str) -> bool:
         """アイテムを削除"""
         for i, item in enumerate(self.items):
             if item.id == item_id:
                 self.items.pop(i)
+                self._invalidate_sorted()
                 return True
         return False
 
@@ -249,24 +470,33 @@ class Timeline:
         """全アイテムを削除"""
         self.items.clear()
         self._id_counter = 0
+        self._time_ordered = True
+        self._invalidate_sorted()
 
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式にエクスポート"""
         return {
             "total_duration": self.get_total_duration(),
-            "items": [
-                {
-                    **item.model_dump(),
-                    "audio_path": str(item.audio_path) if item.audio_path else None,
-                    "image_path": str(item.image_path) if item.image_path else None,
-                }
-                for item in self.sort_by_time()
-            ],
+            "items": [item.to_dict() for item in self.sort_by_time()],
         }
 
     def to_json(self, path: Optional[Path] = None, indent: int = 2) -> str:
         """JSON形式にエクスポート"""
-        json_str = json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+        data = self.to_dict()
+        
+        # orjsonはUTF-8のバイト列を直接出力するので、ファイルにはそのまま書き込む
+        # （インデントは2のみ対応。それ以外は標準のjsonを使う）
+        if orjson is not None and indent in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS
+            if indent == 2:
+                option |= orjson.OPT_INDENT_2
+            json_bytes = orjson.dumps(data, option=option)
+            if path:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(json_bytes)
+            return json_bytes.decode("utf-8")
+        
+        json_str = json.dumps(data, ensure_ascii=False, indent=indent)
         if path:
             path.parent.mkdir(parents=True, exist_ok=True)
             path.write_text(json_str, encoding="utf-8")
@@ -276,7 +506,10 @@ class Timeline:
     def from_dict(cls, data: Dict[str, Any]) -> "Timeline":
         """辞書形式からインポート"""
         timeline = cls()
+        items = []
         for item_data in data.get("items", []):
+            # 種類の変換（dataclassは型変換を行わない）
+            item_data["type"] = ItemType(item_data["type"])
             # パスの変換
             if item_data.get("audio_path"):
                 item_data["audio_path"] = Path(item_data["audio_path"])
@@ -287,13 +520,21 @@ class Timeline:
                 item_data["position"] = tuple(item_data["position"])
             
             item = TimelineItem(**item_data)
-            timeline.add_item(item)
+            if not item.id:
+                item.id = timeline._generate_id(item.type.value)
+            items.append(item)
+        
+        # 1件ずつ add_item せず、まとめて追加する（索引は最初の検索時に作る）
+        timeline._track_time_order(items)
+        timeline.items.extend(items)
         return timeline
 
     @classmethod
     def from_json(cls, path: Path) -> "Timeline":
         """JSONファイルからインポート"""
-        data = json.loads(path.read_text(encoding="utf-8"))
+        # バイト列のまま渡し、UTF-8のデコードはパーサー側で行う
+        raw = path.read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         return cls.from_dict(data)
 
     def __len__(self) -> int:
@@ -5,15 +5,119 @@
 """
 
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import io
 import wave
 import struct
 
+import numpy as np
+import soundfile as sf
 from pydub import AudioSegment
 
 from ..utils.logger import get_logger
 
+try:
+    import soxr  # オプション: 高速・高品質なリサンプリング
+except ImportError:
+    soxr = None
+
+
+# サンプル幅（バイト）-> NumPyで直接扱える整数型（8bit/24bitはpydubで処理する）
+_SAMPLE_DTYPES = {2: np.int16, 4: np.int32}
+
+# 計算済みの音量 id(音声データ) -> (音声データ, dBFS)
+# 音声データ自体も保持し、解放後に同じidが別のデータに使い回されないようにする
+_DBFS_CACHE: Dict[int, Tuple[AudioSegment, float]] = {}
+_DBFS_CACHE_SIZE = 32
+
+
+def _sample_array(audio: AudioSegment) -> Optional[np.ndarray]:
+    """音声データを (フレーム数, チャンネル数) の書き換え可能な整数配列にする（非対応の形式ならNone）"""
+    dtype = _SAMPLE_DTYPES.get(audio.sample_width)
+    if dtype is None:
+        return None
+    return np.frombuffer(audio.raw_data, dtype=dtype).reshape(-1, audio.channels).copy()
+
+
+def _detect_silence(
+    samples: np.ndarray,
+    frame_rate: int,
+    length_ms: int,
+    min_silence_len: int,
+    silence_thresh: float,
+) -> List[List[int]]:
+    """
+    無音区間 [開始, 終了]（ミリ秒）の一覧を求める（pydub.silence.detect_silence と同じ判定）
+    
+    1ミリ秒ずつずらした長さ min_silence_len の窓のRMSを、
+    二乗和の累積和から一括で計算する
+    
+    Args:
+        samples: (フレーム数, チャンネル数) の整数配列
+        frame_rate: サンプルレート
+        length_ms: 音声の長さ（ミリ秒）
+        min_silence_len: 無音と判定する最小長さ（ミリ秒）
+        silence_thresh: 無音と判定する閾値（dBFS）
+    
+    Returns:
+        無音区間のリスト
+    """
+    if length_ms < min_silence_len:
+        return []
+    
+    max_amplitude = float(2 ** (samples.dtype.itemsize * 8 - 1))
+    threshold = 10 ** (silence_thresh / 20) * max_amplitude
+    
+    # フレームごとの二乗和（全チャンネル）の累積和
+    energy = np.square(samples, dtype=np.float64).sum(axis=1)
+    cumulative = np.concatenate(([0.0], np.cumsum(energy)))
+    
+    # 各窓のフレーム範囲（pydubのミリ秒→フレーム変換と同じく切り捨て）
+    starts = np.arange(length_ms - min_silence_len + 1)
+    first = np.minimum(starts * frame_rate // 1000, len(samples))
+    last = np.minimum((starts + min_silence_len) * frame_rate // 1000, len(samples))
+    counts = (last - first) * samples.shape[1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rms = np.sqrt((cumulative[last] - cumulative[first]) / counts)
+    silence_starts = starts[np.nan_to_num(rms) <= threshold]
+    if len(silence_starts) == 0:
+        return []
+    
+    # 窓同士の間隔が無音の長さより空いたところで区間を分ける
+    breaks = np.flatnonzero(np.diff(silence_starts) > min_silence_len)
+    range_starts = silence_starts[np.concatenate(([0], breaks + 1))]
+    range_ends = silence_starts[np.concatenate((breaks, [len(silence_starts) - 1]))] + min_silence_len
+    return [[int(start), int(end)] for start, end in zip(range_starts, range_ends)]
+
+
+def _dbfs(audio: AudioSegment) -> float:
+    """
+    音量（dBFS）を取得（AudioSegmentは不変なので、同じ音声データは1回だけ計算する）
+    
+    Args:
+        audio: 音声データ
+    
+    Returns:
+        音量（dBFS、無音なら -inf）
+    """
+    cached = _DBFS_CACHE.get(id(audio))
+    if cached is not None:
+        return cached[1]
+    
+    samples = _sample_array(audio)
+    if samples is None:
+        dbfs = audio.dBFS
+    else:
+        rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if samples.size else 0.0
+        max_amplitude = float(2 ** (audio.sample_width * 8 - 1))
+        dbfs = 20 * np.log10(rms / max_amplitude) if rms > 0 else -float("inf")
+    
+    if len(_DBFS_CACHE) >= _DBFS_CACHE_SIZE:
+        # 最も古いものを捨てる
+        _DBFS_CACHE.pop(next(iter(_DBFS_CACHE)), None)
+    _DBFS_CACHE[id(audio)] = (audio, float(dbfs))
+    return float(dbfs)
+
 
 class AudioProcessor:
     """音声ファイル処理クラス"""
@@ -36,7 +140,8 @@ class AudioProcessor:
         """音声ファイルを保存する"""
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
-        audio.export(path, format=format)
+        with open(path, "wb", buffering=1024 * 1024) as f:
+            audio.export(f, format=format)
         self.logger.debug(f"音声保存: {path}")
         return path
 
@@ -55,7 +160,7 @@ class AudioProcessor:
         Returns:
             正規化された音声データ
         """
-        change_in_dBFS = target_dBFS - audio.dBFS
+        change_in_dBFS = target_dBFS - _dbfs(audio)
         return audio.apply_gain(change_in_dBFS)
 
     def add_silence(
@@ -97,14 +202,56 @@ class AudioProcessor:
         if not audio_list:
             return AudioSegment.empty()
         
-        result = audio_list[0]
-        for audio in audio_list[1:]:
-            if crossfade_ms > 0:
+        # 形式（チャンネル数・サンプルレート・サンプル幅）を揃えてから1回で連結する
+        # （+ / append で順に連結すると毎回全体をコピーするため O(N^2) になる）
+        synced = AudioSegment._sync(*audio_list)
+        if crossfade_ms <= 0:
+            return synced[0]._spawn(b"".join(audio.raw_data for audio in synced))
+        
+        arrays = [_sample_array(audio) for audio in synced]
+        if arrays[0] is None:
+            result = audio_list[0]
+            for audio in audio_list[1:]:
                 result = result.append(audio, crossfade=crossfade_ms)
-            else:
-                result = result + audio
+            return result
+        
+        if any(crossfade_ms > len(audio) for audio in synced):
+            raise ValueError(f"クロスフェードが音声より長い: {crossfade_ms}ms")
+        
+        n_fade = int(synced[0].frame_rate * crossfade_ms / 1000)
+        return synced[0]._spawn(self._crossfade_samples(arrays, n_fade))
+
+    def _crossfade_samples(self, arrays: List[np.ndarray], n_fade: int) -> bytes:
+        """
+        整数サンプル配列をクロスフェードしながら連結する（出力は1回だけ確保）
+        
+        Args:
+            arrays: (フレーム数, チャンネル数) の整数配列のリスト（同じ型・チャンネル数）
+            n_fade: クロスフェードのフレーム数
+        
+        Returns:
+            連結した音声のバイト列
+        """
+        dtype = arrays[0].dtype
+        work_dtype = np.float32 if dtype == np.int16 else np.float64
+        
+        total = sum(len(array) for array in arrays) - n_fade * (len(arrays) - 1)
+        out = np.empty((total, arrays[0].shape[1]), dtype=work_dtype)
         
-        return result
+        # pydubと同じく、前の音声は振幅1→0、次の音声は0→1で重ねる
+        fade_in = np.linspace(0.0, 1.0, n_fade, endpoint=False, dtype=work_dtype)[:, None]
+        fade_out = np.linspace(1.0, 0.0, n_fade, endpoint=False, dtype=work_dtype)[:, None]
+        
+        end = len(arrays[0])
+        out[:end] = arrays[0]
+        for array in arrays[1:]:
+            seam = slice(end - n_fade, end)
+            out[seam] = out[seam] * fade_out + array[:n_fade] * fade_in
+            out[end:end + len(array) - n_fade] = array[n_fade:]
+            end += len(array) - n_fade
+        
+        info = np.iinfo(dtype)
+        return np.clip(out, info.min, info.max).astype(dtype).tobytes()
 
     def concatenate_files(
         self,
@@ -125,6 +272,11 @@ class AudioProcessor:
         Returns:
             出力ファイルパス
         """
+        # VOICEVOXの出力のように形式が揃ったファイルはNumPy配列のまま連結する
+        output = self._concatenate_files_numpy(file_paths, output_path, silence_between_ms)
+        if output is not None:
+            return output
+        
         audio_list = []
         for path in file_paths:
             audio = self.load_audio(path)
@@ -135,6 +287,47 @@ class AudioProcessor:
         result = self.concatenate(audio_list, crossfade_ms=0)  # 無音挿入時はクロスフェードしない
         return self.save_audio(result, output_path)
 
+    def _concatenate_files_numpy(
+        self,
+        file_paths: List[Union[str, Path]],
+        output_path: Union[str, Path],
+        silence_between_ms: int = 0,
+    ) -> Optional[Path]:
+        """
+        soundfileで読み込み、NumPy配列として1回で連結して書き出す
+        
+        Returns:
+            出力ファイルパス（サンプルレート・チャンネル数が揃っていない、
+            読み込めない形式などの場合はNone）
+        """
+        if not file_paths:
+            return None
+        
+        try:
+            infos = [sf.info(str(path)) for path in file_paths]
+        except RuntimeError:
+            return None
+        
+        samplerate, channels = infos[0].samplerate, infos[0].channels
+        if any(info.samplerate != samplerate or info.channels != channels for info in infos):
+            return None
+        
+        silence = np.zeros((int(samplerate * silence_between_ms / 1000), channels), dtype=np.float32)
+        parts = []
+        for path in file_paths:
+            if parts and len(silence):
+                parts.append(silence)
+            data, _ = sf.read(str(path), dtype="float32", always_2d=True)
+            parts.append(data)
+        
+        # save_audio と同じくWAVで保存（元の量子化ビット数を保てない形式ならPCM 16bit）
+        subtype = infos[0].subtype if sf.check_format("WAV", infos[0].subtype) else "PCM_16"
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        sf.write(str(output_path), np.concatenate(parts), samplerate, subtype=subtype, format="WAV")
+        self.logger.debug(f"音声保存: {output_path}")
+        return output_path
+
     def get_duration(self, audio: AudioSegment) -> float:
         """音声の長さを取得（秒）"""
         return len(audio) / 1000.0
@@ -144,6 +337,26 @@ class AudioProcessor:
         audio = self.load_audio(path)
         return self.get_duration(audio)
 
+    def get_wav_duration_fast(self, path: Union[str, Path]) -> float:
+        """
+        WAVヘッダーのみから音声の長さを取得（秒）
+        
+        サンプルをデコードしないため、VOICEVOXが出力するPCM WAVでは
+        get_duration_from_file より高速。ヘッダーを解釈できない場合は
+        通常の読み込みにフォールバックする。
+        
+        Args:
+            path: WAVファイルパス
+        
+        Returns:
+            音声の長さ（秒）
+        """
+        try:
+            with wave.open(str(path), "rb") as wav:
+                return wav.getnframes() / float(wav.getframerate())
+        except (wave.Error, EOFError, ZeroDivisionError):
+            return self.get_duration_from_file(path)
+
     def adjust_speed(
         self,
         audio: AudioSegment,
@@ -162,6 +375,17 @@ class AudioProcessor:
         if speed_factor == 1.0:
             return audio
         
+        # サンプルをそのまま速いレートの音声とみなし、元のレートへリサンプリングする
+        samples = _sample_array(audio) if soxr is not None else None
+        if samples is not None:
+            resampled = soxr.resample(
+                samples,
+                audio.frame_rate * speed_factor,
+                audio.frame_rate,
+                quality="HQ",
+            )
+            return audio._spawn(np.ascontiguousarray(resampled).tobytes())
+        
         # フレームレートを変更することで速度調整
         new_frame_rate = int(audio.frame_rate * speed_factor)
         return audio._spawn(
@@ -205,11 +429,29 @@ class AudioProcessor:
         Returns:
             フェード適用された音声データ
         """
-        if fade_in_ms > 0:
-            audio = audio.fade_in(fade_in_ms)
-        if fade_out_ms > 0:
-            audio = audio.fade_out(fade_out_ms)
-        return audio
+        if fade_in_ms <= 0 and fade_out_ms <= 0:
+            return audio
+        
+        samples = _sample_array(audio)
+        if samples is None:
+            if fade_in_ms > 0:
+                audio = audio.fade_in(fade_in_ms)
+            if fade_out_ms > 0:
+                audio = audio.fade_out(fade_out_ms)
+            return audio
+        
+        # フェード区間だけに線形のゲイン（pydubと同じく振幅で0→1）を掛ける
+        frames = len(samples)
+        n_in = min(frames, int(audio.frame_rate * fade_in_ms / 1000))
+        n_out = min(frames, int(audio.frame_rate * fade_out_ms / 1000))
+        if n_in > 0:
+            envelope = np.linspace(0.0, 1.0, n_in, endpoint=False, dtype=np.float32)
+            samples[:n_in] = samples[:n_in] * envelope[:, None]
+        if n_out > 0:
+            envelope = np.linspace(1.0, 0.0, n_out, endpoint=False, dtype=np.float32)
+            samples[frames - n_out:] = samples[frames - n_out:] * envelope[:, None]
+        
+        return audio._spawn(samples.tobytes())
 
     def split_on_silence(
         self,
@@ -230,14 +472,53 @@ class AudioProcessor:
         Returns:
             分割された音声データのリスト
         """
-        from pydub.silence import split_on_silence as pydub_split
+        samples = _sample_array(audio)
+        if samples is None or min_silence_len <= 0:
+            from pydub.silence import split_on_silence as pydub_split
+            
+            return pydub_split(
+                audio,
+                min_silence_len=min_silence_len,
+                silence_thresh=silence_thresh,
+                keep_silence=keep_silence,
+            )
+        
+        # 以降は pydub.silence.split_on_silence と同じ手順（無音区間の検出のみNumPyで行う）
+        length = len(audio)
+        if isinstance(keep_silence, bool):
+            keep_silence = length if keep_silence else 0
+        silent_ranges = _detect_silence(samples, audio.frame_rate, length, min_silence_len, silence_thresh)
+        
+        # 無音区間の間を有音区間とする
+        if not silent_ranges:
+            nonsilent_ranges = [[0, length]]
+        elif silent_ranges[0] == [0, length]:
+            nonsilent_ranges = []
+        else:
+            nonsilent_ranges = []
+            prev_end = 0
+            for start, end in silent_ranges:
+                nonsilent_ranges.append([prev_end, start])
+                prev_end = end
+            if prev_end != length:
+                nonsilent_ranges.append([prev_end, length])
+            if nonsilent_ranges[0] == [0, 0]:
+                nonsilent_ranges.pop(0)
+        
+        # 前後に無音を残す（隣と重なる場合は中間で分ける）
+        output_ranges = [
+            [start - keep_silence, end + keep_silence]
+            for start, end in nonsilent_ranges
+        ]
+        for current, following in zip(output_ranges, output_ranges[1:]):
+            if following[0] < current[1]:
+                current[1] = (current[1] + following[0]) // 2
+                following[0] = current[1]
         
-        return pydub_split(
-            audio,
-            min_silence_len=min_silence_len,
-            silence_thresh=silence_thresh,
-            keep_silence=keep_silence,
-        )
+        return [
+            audio[max(start, 0):min(end, length)]
+            for start, end in output_ranges
+        ]
 
     def wav_bytes_to_audio(self, wav_bytes: bytes) -> AudioSegment:
         """WAVバイトデータをAudioSegmentに変換"""
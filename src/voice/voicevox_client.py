@@ -6,29 +6,170 @@ VOICEVOX Engine APIと連携して音声合成を行う
 
 import asyncio
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
 
 import httpx
+import numpy as np
 
 from ..utils.config import Config
 from ..utils.logger import get_logger
 
+try:
+    import uvloop  # オプション: 高速なイベントループ（Linux/macOS）
+except ImportError:
+    uvloop = None
+
+
+# スピーカー一覧・情報をキャッシュする秒数（エンジン側でほぼ変わらない）
+_SPEAKERS_TTL = 300.0
+
+
+def _voice_cache_key(
+    base_url: str,
+    engine_version: str,
+    text: str,
+    speaker: int,
+    *params: float,
+) -> str:
+    """音声キャッシュのキー（エンジン・バージョン・テキスト・スピーカー・パラメータのハッシュ）"""
+    source = "|".join([base_url, engine_version, text, str(speaker), *map(str, params)])
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def _parse_engine_version(response: httpx.Response) -> str:
+    """/version のレスポンスからバージョン文字列を取り出す（取得できなければ"unknown"）"""
+    if response.status_code != 200:
+        return "unknown"
+    return response.text.strip().strip('"') or "unknown"
+
+
+def _read_cache(path: Optional[Path]) -> Optional[bytes]:
+    """キャッシュファイルを読み込む（なければNone）"""
+    if path is None:
+        return None
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _make_temp_path(path: Path) -> Path:
+    """pathと同じディレクトリに一意な一時ファイルを作る（同じ出力先への並列書き込みが衝突しないように）"""
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    return Path(name)
+
+
+def _write_cache(path: Optional[Path], data: bytes) -> None:
+    """キャッシュファイルを書き込む（書き込み途中のファイルが残らないよう置き換える）"""
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _make_temp_path(path)
+    try:
+        tmp_path.write_bytes(data)
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _mora_lengths(audio_query: Dict[str, Any]) -> Iterator[float]:
+    """AudioQueryの子音長・母音長・ポーズ長を順に返す（値のないものは飛ばす）"""
+    for accent_phrase in audio_query.get("accent_phrases", []):
+        for mora in accent_phrase.get("moras", []):
+            if mora.get("consonant_length"):
+                yield mora["consonant_length"]
+            if mora.get("vowel_length"):
+                yield mora["vowel_length"]
+        # ポーズ
+        pause = accent_phrase.get("pause_mora")
+        if pause and pause.get("vowel_length"):
+            yield pause["vowel_length"]
+
+
+def _query_duration(audio_query: Dict[str, Any]) -> float:
+    """
+    AudioQueryから音声の長さ（秒）を計算
+    
+    全モーラの長さを1つの配列に集めて1回で合計し、話速で割る
+    """
+    duration = float(np.fromiter(_mora_lengths(audio_query), dtype=np.float64).sum())
+    
+    # speedScaleで調整
+    speed_scale = audio_query.get("speedScale", 1.0)
+    if speed_scale > 0:
+        duration /= speed_scale
+    
+    return duration
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """ファイルをコピー（書き込み途中のファイルが残らないよう置き換える）"""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _make_temp_path(dst)
+    try:
+        shutil.copyfile(src, tmp_path)
+        tmp_path.replace(dst)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 
 class VoicevoxClient:
     """VOICEVOX Engine APIクライアント"""
 
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
         """
         Args:
             base_url: VOICEVOX Engine URL (デフォルト: http://localhost:50021)
+            cache_dir: 合成済み音声のキャッシュディレクトリ（指定なしでキャッシュしない）。
+                キーにエンジンのバージョンを含む。古いキャッシュは自動削除しないので、
+                消す場合はディレクトリごと削除する
         """
         config = Config.get()
         self.base_url = base_url or config.voicevox.url
+        self.concurrency = config.voicevox.concurrency
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.logger = get_logger()
         self._client: Optional[httpx.AsyncClient] = None
+        
+        # エンジンのバージョン（キャッシュのキーに使う。キャッシュ有効時に接続時に1回だけ取得）
+        self._engine_version = "unknown"
+        
+        # 取得時刻と結果（スピーカー一覧、スピーカーID -> 情報）
+        self._speakers_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+        self._speaker_info_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+
+    def _cache_path(self, suffix: str, text: str, speaker: int, *params: float) -> Optional[Path]:
+        """キャッシュファイルのパス（キャッシュ無効ならNone）"""
+        if self.cache_dir is None:
+            return None
+        key = _voice_cache_key(self.base_url, self._engine_version, text, speaker, *params)
+        return self.cache_dir / f"{key}{suffix}"
 
     async def __aenter__(self) -> "VoicevoxClient":
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=60.0)
+        # 並列リクエスト数ぶんの接続を保持し、リクエストごとの接続確立を避ける
+        limits = httpx.Limits(
+            max_connections=max(1, self.concurrency) * 2,
+            max_keepalive_connections=max(1, self.concurrency),
+        )
+        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=60.0, limits=limits)
+        if self.cache_dir is not None:
+            try:
+                self._engine_version = _parse_engine_version(await self._client.get("/version"))
+            except httpx.HTTPError:
+                self._engine_version = "unknown"
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
@@ -50,16 +191,28 @@ class VoicevoxClient:
             return False
 
     async def get_speakers(self) -> List[Dict[str, Any]]:
-        """利用可能なスピーカー一覧を取得"""
+        """利用可能なスピーカー一覧を取得（一定時間はキャッシュを返す）"""
+        cached = self._speakers_cache
+        if cached is not None and time.monotonic() - cached[0] < _SPEAKERS_TTL:
+            return cached[1]
+        
         response = await self.client.get("/speakers")
         response.raise_for_status()
-        return response.json()
+        speakers = response.json()
+        self._speakers_cache = (time.monotonic(), speakers)
+        return speakers
 
     async def get_speaker_info(self, speaker_id: int) -> Dict[str, Any]:
-        """スピーカー情報を取得"""
+        """スピーカー情報を取得（一定時間はキャッシュを返す）"""
+        cached = self._speaker_info_cache.get(speaker_id)
+        if cached is not None and time.monotonic() - cached[0] < _SPEAKERS_TTL:
+            return cached[1]
+        
         response = await self.client.get(f"/speaker_info", params={"speaker": speaker_id})
         response.raise_for_status()
-        return response.json()
+        info = response.json()
+        self._speaker_info_cache[speaker_id] = (time.monotonic(), info)
+        return info
 
     async def create_audio_query(
         self,
@@ -123,6 +276,45 @@ class VoicevoxClient:
         response.raise_for_status()
         return response.content
 
+    async def synthesize_to_file(
+        self,
+        audio_query: Dict[str, Any],
+        speaker: int,
+        output_path: Path,
+    ) -> Path:
+        """
+        音声を合成し、レスポンスを受け取りながらファイルに書き込む（全体をメモリに持たない）
+        
+        Args:
+            audio_query: AudioQuery オブジェクト
+            speaker: スピーカーID
+            output_path: 出力ファイルパス
+        
+        Returns:
+            出力ファイルパス
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _make_temp_path(output_path)
+        
+        try:
+            async with self.client.stream(
+                "POST",
+                "/synthesis",
+                params={"speaker": speaker},
+                json=audio_query,
+            ) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb", buffering=1024 * 1024) as f:
+                    async for chunk in response.aiter_bytes(65536):
+                        f.write(chunk)
+            tmp_path.replace(output_path)
+        except BaseException:
+            # 失敗・キャンセル時は書きかけの一時ファイルを残さない
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        return output_path
+
     async def text_to_speech(
         self,
         text: str,
@@ -132,7 +324,8 @@ class VoicevoxClient:
         pitch_scale: float = 0.0,
         intonation_scale: float = 1.0,
         volume_scale: float = 1.0,
-    ) -> bytes:
+        return_audio: bool = True,
+    ) -> Optional[bytes]:
         """
         テキストから音声を生成
         
@@ -144,24 +337,56 @@ class VoicevoxClient:
             pitch_scale: 音高
             intonation_scale: 抑揚
             volume_scale: 音量
+            return_audio: Falseかつoutput_path指定時は、音声データを返さずファイルへ直接書き込む
         
         Returns:
-            WAV音声データ
+            WAV音声データ（return_audio=False でファイルに書き込んだ場合はNone）
         """
-        self.logger.info(f"音声生成: '{text[:20]}...' (speaker={speaker})")
-        
-        # AudioQuery作成
-        query = await self.create_audio_query(
-            text=text,
-            speaker=speaker,
-            speed_scale=speed_scale,
-            pitch_scale=pitch_scale,
-            intonation_scale=intonation_scale,
-            volume_scale=volume_scale,
+        # 同じテキスト・パラメータの音声は合成済みのものを使う
+        cache_path = self._cache_path(
+            ".wav", text, speaker, speed_scale, pitch_scale, intonation_scale, volume_scale,
         )
         
-        # 音声合成
-        audio_data = await self.synthesize(query, speaker)
+        if output_path and not return_audio:
+            if cache_path is not None and cache_path.exists():
+                self.logger.debug(f"音声キャッシュ使用: '{text[:20]}...' (speaker={speaker})")
+                await asyncio.to_thread(_copy_file, cache_path, output_path)
+            else:
+                self.logger.info(f"音声生成: '{text[:20]}...' (speaker={speaker})")
+                query = await self.create_audio_query(
+                    text=text,
+                    speaker=speaker,
+                    speed_scale=speed_scale,
+                    pitch_scale=pitch_scale,
+                    intonation_scale=intonation_scale,
+                    volume_scale=volume_scale,
+                )
+                await self.synthesize_to_file(query, speaker, output_path)
+                if cache_path is not None:
+                    await asyncio.to_thread(_copy_file, output_path, cache_path)
+            self.logger.info(f"音声保存: {output_path}")
+            return None
+        
+        audio_data = await asyncio.to_thread(_read_cache, cache_path)
+        
+        if audio_data is None:
+            self.logger.info(f"音声生成: '{text[:20]}...' (speaker={speaker})")
+            
+            # AudioQuery作成
+            query = await self.create_audio_query(
+                text=text,
+                speaker=speaker,
+                speed_scale=speed_scale,
+                pitch_scale=pitch_scale,
+                intonation_scale=intonation_scale,
+                volume_scale=volume_scale,
+            )
+            
+            # 音声合成
+            audio_data = await self.synthesize(query, speaker)
+            await asyncio.to_thread(_write_cache, cache_path, audio_data)
+        else:
+            self.logger.debug(f"音声キャッシュ使用: '{text[:20]}...' (speaker={speaker})")
         
         # ファイル保存
         if output_path:
@@ -171,6 +396,42 @@ class VoicevoxClient:
         
         return audio_data
 
+    async def text_to_speech_many(
+        self,
+        jobs: List[Dict[str, Any]],
+        concurrency: Optional[int] = None,
+        on_complete: Optional[Callable[[int], None]] = None,
+    ) -> List[Optional[bytes]]:
+        """
+        複数のテキストから音声を並列生成（同時リクエスト数はセマフォで制限）
+        
+        Args:
+            jobs: text_to_speech のキーワード引数のリスト
+            concurrency: 同時リクエスト数（デフォルト: config.voicevox.concurrency）
+            on_complete: 1件完了するごとに呼ばれるコールバック（引数はjobsのインデックス）
+        
+        Returns:
+            WAV音声データのリスト（jobsと同じ順序。return_audio=False のジョブはNone）
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.concurrency))
+        
+        async def run_one(index: int, job: Dict[str, Any]) -> Optional[bytes]:
+            async with semaphore:
+                audio_data = await self.text_to_speech(**job)
+            if on_complete:
+                on_complete(index)
+            return audio_data
+        
+        tasks = [asyncio.ensure_future(run_one(i, job)) for i, job in enumerate(jobs)]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # 1件でも失敗したら残りを止める（クライアントを閉じた後に動き続けないように）
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
     async def get_audio_duration(self, audio_query: Dict[str, Any]) -> float:
         """
         AudioQueryから音声の長さを計算
@@ -181,55 +442,108 @@ class VoicevoxClient:
         Returns:
             音声の長さ（秒）
         """
-        duration = 0.0
-        for accent_phrase in audio_query.get("accent_phrases", []):
-            for mora in accent_phrase.get("moras", []):
-                if mora.get("consonant_length"):
-                    duration += mora["consonant_length"]
-                if mora.get("vowel_length"):
-                    duration += mora["vowel_length"]
-            # ポーズ
-            if accent_phrase.get("pause_mora"):
-                pause = accent_phrase["pause_mora"]
-                if pause.get("vowel_length"):
-                    duration += pause["vowel_length"]
-        
-        # speedScaleで調整
-        speed_scale = audio_query.get("speedScale", 1.0)
-        if speed_scale > 0:
-            duration /= speed_scale
-        
-        return duration
+        return _query_duration(audio_query)
 
 
 # 同期版ラッパー
 class VoicevoxClientSync:
     """VOICEVOX クライアント（同期版）"""
 
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            base_url: VOICEVOX Engine URL (デフォルト: http://localhost:50021)
+            cache_dir: 合成済み音声のキャッシュディレクトリ（指定なしでキャッシュしない）。
+                キーにエンジンのバージョンを含む。古いキャッシュは自動削除しないので、
+                消す場合はディレクトリごと削除する
+        """
         config = Config.get()
         self.base_url = base_url or config.voicevox.url
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         self.logger = get_logger()
+        
+        # エンジンのバージョン（キャッシュのキーに使う。初回のキャッシュ参照時に1回だけ取得）
+        self._engine_version: Optional[str] = None
+        
+        # 呼び出しごとに接続・イベントループを作らず、使い回す（遅延作成）
+        self._client: Optional[httpx.Client] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # 取得時刻とスピーカー一覧
+        self._speakers_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+
+    def __enter__(self) -> "VoicevoxClientSync":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def client(self) -> httpx.Client:
+        """キープアライブする同期HTTPクライアント"""
+        if self._client is None:
+            self._client = httpx.Client(
+                base_url=self.base_url,
+                timeout=60.0,
+                limits=httpx.Limits(max_keepalive_connections=8),
+            )
+        return self._client
+
+    def close(self) -> None:
+        """HTTPクライアントとイベントループを閉じる"""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    def _cache_path(self, suffix: str, text: str, speaker: int, *params: float) -> Optional[Path]:
+        """キャッシュファイルのパス（キャッシュ無効ならNone）"""
+        if self.cache_dir is None:
+            return None
+        if self._engine_version is None:
+            try:
+                response = self.client.get("/version", timeout=5.0)
+            except httpx.HTTPError:
+                response = None
+            # 取得できなかった場合は覚えず、次の呼び出しで再取得する
+            if response is not None and response.status_code == 200:
+                self._engine_version = _parse_engine_version(response)
+        engine_version = self._engine_version or "unknown"
+        key = _voice_cache_key(self.base_url, engine_version, text, speaker, *params)
+        return self.cache_dir / f"{key}{suffix}"
 
     def _run(self, coro):
-        """コルーチンを実行"""
-        return asyncio.get_event_loop().run_until_complete(coro)
+        """コルーチンを実行（イベントループはインスタンスごとに1つを使い回す）"""
+        if self._loop is None:
+            # uvloopがあれば使う（多数の並列リクエストでのタスク処理が軽い）
+            self._loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
 
     def is_available(self) -> bool:
         """VOICEVOX Engineが利用可能か確認"""
         try:
-            with httpx.Client(base_url=self.base_url, timeout=5.0) as client:
-                response = client.get("/version")
-                return response.status_code == 200
+            response = self.client.get("/version", timeout=5.0)
+            return response.status_code == 200
         except Exception:
             return False
 
     def get_speakers(self) -> List[Dict[str, Any]]:
-        """利用可能なスピーカー一覧を取得"""
-        with httpx.Client(base_url=self.base_url, timeout=30.0) as client:
-            response = client.get("/speakers")
-            response.raise_for_status()
-            return response.json()
+        """利用可能なスピーカー一覧を取得（一定時間はキャッシュを返す）"""
+        cached = self._speakers_cache
+        if cached is not None and time.monotonic() - cached[0] < _SPEAKERS_TTL:
+            return cached[1]
+        
+        response = self.client.get("/speakers", timeout=30.0)
+        response.raise_for_status()
+        speakers = response.json()
+        self._speakers_cache = (time.monotonic(), speakers)
+        return speakers
 
     def text_to_speech(
         self,
@@ -242,11 +556,17 @@ class VoicevoxClientSync:
         volume_scale: float = 1.0,
     ) -> bytes:
         """テキストから音声を生成（同期版）"""
-        self.logger.info(f"音声生成: '{text[:20]}...' (speaker={speaker})")
-        
-        with httpx.Client(base_url=self.base_url, timeout=60.0) as client:
+        cache_path = self._cache_path(
+            ".wav", text, speaker, speed_scale, pitch_scale, intonation_scale, volume_scale,
+        )
+        audio_data = _read_cache(cache_path)
+        if audio_data is not None:
+            self.logger.debug(f"音声キャッシュ使用: '{text[:20]}...' (speaker={speaker})")
+        else:
+            self.logger.info(f"音声生成: '{text[:20]}...' (speaker={speaker})")
+            
             # AudioQuery作成
-            response = client.post(
+            response = self.client.post(
                 "/audio_query",
                 params={"text": text, "speaker": speaker},
             )
@@ -260,13 +580,14 @@ class VoicevoxClientSync:
             query["volumeScale"] = volume_scale
             
             # 音声合成
-            response = client.post(
+            response = self.client.post(
                 "/synthesis",
                 params={"speaker": speaker},
                 json=query,
             )
             response.raise_for_status()
             audio_data = response.content
+            _write_cache(cache_path, audio_data)
         
         # ファイル保存
         if output_path:
@@ -276,26 +597,43 @@ class VoicevoxClientSync:
         
         return audio_data
 
+    def text_to_speech_batch(
+        self,
+        jobs: List[Dict[str, Any]],
+        concurrency: Optional[int] = None,
+        on_complete: Optional[Callable[[int], None]] = None,
+    ) -> List[Optional[bytes]]:
+        """
+        複数のテキストから音声を並列生成
+        
+        Args:
+            jobs: text_to_speech のキーワード引数のリスト
+            concurrency: 同時リクエスト数（デフォルト: config.voicevox.concurrency）
+            on_complete: 1件完了するごとに呼ばれるコールバック（引数はjobsのインデックス）
+        
+        Returns:
+            WAV音声データのリスト（jobsと同じ順序。return_audio=False のジョブはNone）
+        """
+        async def run_all() -> List[Optional[bytes]]:
+            async with VoicevoxClient(self.base_url, cache_dir=self.cache_dir) as client:
+                return await client.text_to_speech_many(jobs, concurrency, on_complete)
+        
+        return self._run(run_all())
+
     def get_audio_duration_from_text(self, text: str, speaker: int) -> float:
-        """テキストから音声長を取得"""
-        with httpx.Client(base_url=self.base_url, timeout=30.0) as client:
-            response = client.post(
+        """テキストから音声長を取得（AudioQueryはキャッシュする）"""
+        cache_path = self._cache_path(".json", text, speaker)
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            query = json.loads(cached)
+        else:
+            response = self.client.post(
                 "/audio_query",
                 params={"text": text, "speaker": speaker},
+                timeout=30.0,
             )
             response.raise_for_status()
             query = response.json()
-            
-            duration = 0.0
-            for accent_phrase in query.get("accent_phrases", []):
-                for mora in accent_phrase.get("moras", []):
-                    if mora.get("consonant_length"):
-                        duration += mora["consonant_length"]
-                    if mora.get("vowel_length"):
-                        duration += mora["vowel_length"]
-                if accent_phrase.get("pause_mora"):
-                    pause = accent_phrase["pause_mora"]
-                    if pause.get("vowel_length"):
-                        duration += pause["vowel_length"]
-            
-            return duration
+            _write_cache(cache_path, json.dumps(query).encode("utf-8"))
+        
+        return _query_duration(query)
@@ -0,0 +1,24 @@
+"""字幕生成のテスト"""
+
+import pytest
+
+from src.video.subtitle import SubtitleGenerator
+
+
+@pytest.fixture
+def generator() -> SubtitleGenerator:
+    # フォントが見つからなくてもデフォルトフォントで動く
+    return SubtitleGenerator(font_path="missing-font.ttf", font_size=20, stroke_width=0)
+
+
+def test_wrap_text_keeps_explicit_newlines(generator):
+    """改行を含むテキストでも例外にならず、改行はそのまま残る"""
+    assert generator._wrap_text("a\nb", 500) == "a\nb"
+
+
+def test_wrap_text_resets_width_after_newline(generator, monkeypatch):
+    """改行の後は行幅を数え直して折り返す"""
+    monkeypatch.setattr(generator, "_char_width", lambda char, font, font_size: 10.0)
+    
+    assert generator._wrap_text("あいうえお\nかき", 30) == "あいう\nえお\nかき"
+    assert generator._wrap_text("あいう\n\nかき", 30) == "あいう\n\nかき"